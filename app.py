@@ -1,13 +1,12 @@
 from gettext import gettext
 import dash
 from dash import html, dcc
-from dash.dependencies import Input, Output
+from dash.dependencies import ClientsideFunction, Input, Output, State
 from flask import Flask
-from datetime import datetime
 
 from meteo.app.widgets.temperature_evolution import TemperatureEvolutionWidget
-from meteo.extensions import babel, get_locale
-from meteo import defs
+from meteo.extensions import N_, babel, get_locale, load_catalogs
+from meteo import compression, defs, metrics, profiling
 from meteo.app.widgets import (
     AtmosphericConditionsWidgets,
     CurrentWeatherWidget,
@@ -16,6 +15,15 @@ from meteo.app.widgets import (
 )
 from meteo.forecast.forecast import Forecast
 
+LAST_UPDATED_MESSAGES = [
+    N_("Never"),
+    N_("Just now"),
+    N_("Less than a minute ago"),
+    N_("%(num)d minute(s) ago"),
+    N_("%(num)d hour(s) ago"),
+    N_("%(num)d day(s) ago"),
+]
+
 # Sample data
 # df = pd.DataFrame({"x": [1, 2, 3, 4, 5], "y": [10, 11, 12, 13, 14]})
 
@@ -34,6 +42,10 @@ app = dash.Dash(
 )
 
 babel.init_app(app.server, locale_selector=get_locale)
+metrics.init_app(app.server)
+profiling.init_app(app.server)
+# Last, so that the hooks above, run in reverse order, see the response as sent
+compression.init_app(app.server)
 
 
 app.index_string = """
@@ -84,6 +96,10 @@ header = html.Header(
         ),
         html.P("Paris, France", id="location", className="text-muted-foreground"),
         dcc.Store(id="last-updated-store", data=None),
+        dcc.Store(
+            id=defs.LAST_UPDATED_TRANSLATIONS_ID,
+            data=load_catalogs(LAST_UPDATED_MESSAGES),
+        ),
         dcc.Interval(
             id=defs.FAST_REFRESH_INTERVAL_ID,
             interval=defs.FAST_REFRESH_INTERVAL_MS,
@@ -117,32 +133,18 @@ app.layout = html.Div(
 for widget in widgets:
     if not isinstance(widget, Widget):
         continue
-    widget.setup_callbacks(app)
+    widget.setup_callbacks(metrics.instrument(app))
 
 
-@app.callback(
+# Relative time of the last update, computed in the browser (see
+# assets/last-updated.js) rather than by a server request every 10 seconds
+app.clientside_callback(
+    ClientsideFunction(namespace="meteo", function_name="lastUpdated"),
     Output("last-updated-timestamp", "children"),
     Input(defs.LAST_UPDATED_ID, "data"),
     Input(defs.FAST_REFRESH_INTERVAL_ID, "n_intervals"),
+    State(defs.LAST_UPDATED_TRANSLATIONS_ID, "data"),
 )
-def update_last_updated(last_updated: int, n_intervals: int) -> str:
-    if last_updated is None:
-        return gettext("Never")
-
-    now = datetime.now()
-    diff = now.timestamp() - last_updated
-    if diff < 20:
-        return gettext("Just now")
-    if diff < 60:
-        return gettext("Less than a minute ago")
-
-    minutes = int(diff // 60)
-    if minutes < 60:
-        return gettext(f"{minutes} minute(s) ago")
-    hours = minutes // 60
-    if hours < 24:
-        return gettext(f"{hours} hour(s) ago")
-    return gettext(f"{hours // 24} day(s) ago")
 
 
 if __name__ == "__main__":
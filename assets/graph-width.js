@@ -0,0 +1,12 @@
+// Width of an element in pixels, for the server to size what it draws in it.
+window.dash_clientside = window.dash_clientside || {};
+window.dash_clientside.meteo = Object.assign({}, window.dash_clientside.meteo, {
+    elementWidth: function (nIntervals, id, width) {
+        const element = document.getElementById(id);
+        const measured = element ? element.clientWidth : null;
+        if (!measured || measured === width) {
+            return window.dash_clientside.no_update;
+        }
+        return measured;
+    },
+});
@@ -0,0 +1,43 @@
+// Relative time of the last forecast update, refreshed in the browser.
+// Translations come from the "last-updated-translations" store, built from
+// the .po catalogs by the server.
+window.dash_clientside = window.dash_clientside || {};
+window.dash_clientside.meteo = Object.assign({}, window.dash_clientside.meteo, {
+    lastUpdated: function (lastUpdated, nIntervals, catalogs) {
+        const catalog = bestCatalog(catalogs || {});
+        const translate = (message, num) =>
+            (catalog[message] || message).replace("%(num)d", num);
+
+        if (lastUpdated === null || lastUpdated === undefined) {
+            return translate("Never");
+        }
+        const diff = Date.now() / 1000 - lastUpdated;
+        if (diff < 20) {
+            return translate("Just now");
+        }
+        if (diff < 60) {
+            return translate("Less than a minute ago");
+        }
+        const minutes = Math.floor(diff / 60);
+        if (minutes < 60) {
+            return translate("%(num)d minute(s) ago", minutes);
+        }
+        const hours = Math.floor(minutes / 60);
+        if (hours < 24) {
+            return translate("%(num)d hour(s) ago", hours);
+        }
+        return translate("%(num)d day(s) ago", Math.floor(hours / 24));
+    },
+});
+
+// Catalog of the first preferred language of the browser that has one, as
+// the server picks the locale from the Accept-Language header
+function bestCatalog(catalogs) {
+    for (const language of navigator.languages || [navigator.language]) {
+        const catalog = catalogs[language] || catalogs[language.split("-")[0]];
+        if (catalog) {
+            return catalog;
+        }
+    }
+    return {};
+}
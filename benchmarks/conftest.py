@@ -0,0 +1,69 @@
+import json
+
+import dash
+import openmeteo_requests
+import plotly
+import pytest
+
+from meteo.app.widgets import Widget
+from meteo.forecast import Forecast
+from meteo.forecast.cache import request_key
+from meteo.forecast.replay import synthesize
+
+
+class CannedResponse:
+    status_code = 200
+
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+class CannedSession:
+    """Session answering every request with a synthesized response, built once."""
+
+    def __init__(self):
+        self.responses: dict[str, bytes] = {}
+
+    def get(self, url: str, params: dict, **kwargs) -> CannedResponse:
+        key = request_key(url, params)
+        if key not in self.responses:
+            params = {
+                name: (
+                    [str(v) for v in value] if isinstance(value, list) else [str(value)]
+                )
+                for name, value in params.items()
+            }
+            self.responses[key] = b"".join(
+                synthesize(float(latitude), float(longitude), params)
+                for latitude, longitude in zip(params["latitude"], params["longitude"])
+            )
+        return CannedResponse(self.responses[key])
+
+    def close(self) -> None:
+        pass
+
+
+def json_size(value) -> int:
+    """Returns the size of a value serialized like Dash sends it."""
+    return len(json.dumps(value, cls=plotly.utils.PlotlyJSONEncoder))
+
+
+@pytest.fixture(scope="session")
+def forecast() -> Forecast:
+    Forecast.openmeteo = openmeteo_requests.Client(session=CannedSession())
+    forecast = Forecast(None, Forecast.Coordinates.PARIS.value)
+    forecast.snapshot.get()
+    return forecast
+
+
+@pytest.fixture
+def app() -> dash.Dash:
+    return dash.Dash(__name__)
+
+
+@pytest.fixture
+def config(app: dash.Dash, forecast: Forecast) -> Widget.Config:
+    return Widget.Config(app, forecast=forecast)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from meteo.conditions import UvRisk, WeatherDescription
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.parametrize("is_night", [False, True])
+def test_get_condition(benchmark, is_night: bool):
+    condition = benchmark(WeatherDescription.get_condition, 61, is_night)
+    assert condition.code == 61
+
+
+def test_get_condition_all_codes(benchmark):
+    codes = [0, 1, 2, 3, 45, 48, 51, 61, 63, 71, 80, 95, 99]
+
+    def get_conditions():
+        return [WeatherDescription.get_condition(code, False) for code in codes]
+
+    assert len(benchmark(get_conditions)) == len(codes)
+
+
+def test_get_images(benchmark, forecast):
+    codes = forecast.snapshot.get().hourly.weather_code
+
+    images = benchmark(WeatherDescription.get_images, codes)
+    assert len(images) == len(codes)
+
+
+def test_uv_risks(benchmark, forecast):
+    uv_indices = forecast.snapshot.get().daily.uv_index_max
+
+    risks = benchmark(UvRisk.from_index, uv_indices)
+    assert len(risks) == len(uv_indices)
+
+
+# The risk of the index as displayed, rounded, and not of the raw index
+ROUNDED_UV_RISKS = {
+    2.4: "Low",
+    2.6: "Moderate",
+    5.7: "High",
+    7.5: "Very High",
+    10.4: "Very High",
+    10.6: "Extreme",
+}
+
+
+@pytest.mark.parametrize("uv_index", ROUNDED_UV_RISKS)
+def test_uv_risk(benchmark, uv_index: float):
+    risk = benchmark(UvRisk.from_index, uv_index)
+    assert risk.label == ROUNDED_UV_RISKS[uv_index]
+    (in_array,) = UvRisk.from_index(np.array([uv_index]))
+    assert in_array is risk
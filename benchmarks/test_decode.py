@@ -0,0 +1,37 @@
+import pytest
+from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
+
+from meteo.forecast import Forecast
+from meteo.forecast.replay import synthesize
+from meteo.forecast.series import HourlySeries
+
+pytest.importorskip("pytest_benchmark")
+
+DAYS = [1, 7, 16]
+
+
+@pytest.mark.parametrize("days", DAYS)
+def test_fetch_daily_weather(benchmark, forecast: Forecast, days: int):
+    daily = benchmark(forecast.fetch_daily_weather, forecast_days=days)
+    assert len(daily) == days
+
+
+@pytest.mark.parametrize("days", DAYS)
+def test_fetch_hourly_weather(benchmark, forecast: Forecast, days: int):
+    hourly = benchmark(forecast.fetch_hourly_weather, forecast_days=days)
+    assert len(hourly) == days * 24
+
+
+@pytest.mark.parametrize("resolution", ["hourly", "minutely_15"])
+@pytest.mark.parametrize("days", DAYS)
+def test_decode_series(benchmark, days: int, resolution: str):
+    params = {
+        resolution: Forecast.HOURLY_VARIABLES,
+        "forecast_days": [str(days)],
+    }
+    content = synthesize(*Forecast.Coordinates.PARIS.value, params)
+    response = WeatherApiResponse.GetRootAs(content, 4)
+    variables = response.Hourly() if resolution == "hourly" else response.Minutely15()
+
+    series = benchmark(HourlySeries.decode, variables, "C")
+    assert len(series) == days * (24 if resolution == "hourly" else 96)
@@ -0,0 +1,116 @@
+import dataclasses
+
+import numpy as np
+import pytest
+
+from meteo.forecast import Forecast
+from meteo.forecast import snapshot as snapshot_module
+from meteo.forecast.series import HourlySeries
+from meteo.forecast.snapshot import HOUR_S, ForecastSnapshot
+
+pytest.importorskip("pytest_benchmark")
+
+# Start of an hour, as returned by `_current_hour`
+HOUR = 497_878 * HOUR_S
+
+
+def hourly(start: int, end: int, offset: float = 0.0) -> HourlySeries:
+    """Returns hours [start, end), each as warm as its offset to HOUR plus `offset`."""
+    epochs = np.arange(start, end, HOUR_S, dtype=np.int64)
+    hours = ((epochs - HOUR) // HOUR_S).astype(np.float32)
+    return HourlySeries(
+        epochs,
+        temperature_2m=hours + np.float32(offset),
+        weather_code=np.zeros(len(epochs), np.float32),
+        precipitation_probability=np.zeros(len(epochs), np.float32),
+    )
+
+
+def holding(
+    coordinates: tuple[float, float], series: HourlySeries | None
+) -> ForecastSnapshot:
+    snapshot = Forecast(None, coordinates).snapshot
+    if series is not None:
+        snapshot._data = dataclasses.replace(
+            ForecastSnapshot.Data.empty(), hourly=series
+        )
+    return snapshot
+
+
+@pytest.fixture
+def now(monkeypatch) -> list[int]:
+    """The current hour, as a one-item list to move it forward."""
+    now = [HOUR]
+    monkeypatch.setattr(snapshot_module, "_current_hour", lambda: now[0])
+    return now
+
+
+def test_missing_past_hours_when_empty(benchmark, now):
+    snapshot = holding(Forecast.Coordinates.PARIS.value, None)
+
+    assert benchmark(snapshot.missing_past_hours) == snapshot.past_hours
+    assert snapshot.params(["hourly"])["past_hours"] == snapshot.past_hours
+
+
+def test_hour_rollover(benchmark, now):
+    # Fetched during the previous hour, which is now past
+    held = hourly(HOUR - 24 * HOUR_S, HOUR + 24 * HOUR_S)
+    snapshot = holding(Forecast.Coordinates.PARIS.value, held)
+    now[0] = HOUR + HOUR_S
+
+    assert benchmark(snapshot.missing_past_hours) == 0
+    assert "past_hours" not in snapshot.params(["hourly"])
+
+    fetched = hourly(HOUR + HOUR_S, HOUR + 25 * HOUR_S, offset=100)
+    merged = snapshot._merge_hourly(held, fetched)
+    np.testing.assert_array_equal(
+        merged.epoch, np.arange(HOUR - 23 * HOUR_S, HOUR + 25 * HOUR_S, HOUR_S)
+    )
+    # Past hours as held, the current and next ones as fetched
+    temperature = merged.column("temperature_2m")
+    assert temperature[merged.epoch == HOUR][0] == 0
+    assert temperature[merged.epoch == HOUR + HOUR_S][0] == 101
+
+
+def test_missed_refreshes(benchmark, now):
+    # Stored up to HOUR, then no refresh for 4 hours
+    held = hourly(HOUR - 24 * HOUR_S, HOUR + HOUR_S)
+    snapshot = holding(Forecast.Coordinates.PARIS.value, held)
+    now[0] = HOUR + 4 * HOUR_S
+
+    assert benchmark(snapshot.missing_past_hours) == 3
+    assert snapshot.params(["hourly"])["past_hours"] == 3
+
+    # The API answers the 3 missing past hours, then the current one onward
+    fetched = hourly(HOUR + HOUR_S, HOUR + 28 * HOUR_S, offset=100)
+    merged = snapshot._merge_hourly(held, fetched)
+    np.testing.assert_array_equal(
+        merged.epoch, np.arange(HOUR - 20 * HOUR_S, HOUR + 28 * HOUR_S, HOUR_S)
+    )
+
+
+def test_missed_refreshes_beyond_past_hours(benchmark, now):
+    held = hourly(HOUR - 24 * HOUR_S, HOUR + HOUR_S)
+    snapshot = holding(Forecast.Coordinates.PARIS.value, held)
+    now[0] = HOUR + 30 * HOUR_S
+
+    assert benchmark(snapshot.missing_past_hours) == snapshot.past_hours
+
+    fetched = hourly(now[0] - 24 * HOUR_S, now[0] + 24 * HOUR_S, offset=100)
+    merged = snapshot._merge_hourly(held, fetched)
+    np.testing.assert_array_equal(merged.epoch, fetched.epoch)
+
+
+def test_batch_params(benchmark, now):
+    held = hourly(HOUR - 24 * HOUR_S, HOUR + 24 * HOUR_S)
+    holding_all = holding(Forecast.Coordinates.PARIS.value, held)
+    empty = holding(Forecast.Coordinates.BERLIN.value, None)
+    now[0] = HOUR + HOUR_S
+
+    params = benchmark(ForecastSnapshot.batch_params, [holding_all, empty], ["hourly"])
+    # Every past hour, for the snapshot holding none
+    assert params["past_hours"] == empty.past_hours
+    assert params["latitude"] == [48.85, 52.52]
+
+    params = ForecastSnapshot.batch_params([holding_all, holding_all], ["hourly"])
+    assert "past_hours" not in params
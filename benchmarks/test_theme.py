@@ -0,0 +1,36 @@
+import pytest
+
+from meteo.app.theme import parse_tailwind_config
+
+pytest.importorskip("pytest_benchmark")
+
+CONFIG = """
+// Theme of the dashboard, https://tailwindcss.com/docs/configuration
+tailwind.config = {
+    theme: {
+        extend: {
+            colors: {
+                background: '#0a0a0a', /* near black */
+                'card-foreground': "#ededed", // light grey
+            },
+            backgroundImage: {
+                hero: "url('https://example.com/hero.png')",
+            },
+            fontFamily: {
+                sans: ['Inter', 'https://fonts.example.com/inter.css'],
+            },
+        },
+    },
+}
+"""
+
+
+def test_parse_tailwind_config(benchmark):
+    config = benchmark(parse_tailwind_config, CONFIG)
+    extend = config["theme"]["extend"]
+    assert extend["colors"] == {
+        "background": "#0a0a0a",
+        "card-foreground": "#ededed",
+    }
+    assert extend["backgroundImage"]["hero"] == "url('https://example.com/hero.png')"
+    assert extend["fontFamily"]["sans"][1] == "https://fonts.example.com/inter.css"
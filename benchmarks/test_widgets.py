@@ -0,0 +1,41 @@
+import pytest
+
+from meteo.app.widgets import (
+    AtmosphericConditionsWidgets,
+    CurrentWeatherWidget,
+    DailyForecastWidget,
+    TemperatureEvolutionWidget,
+    Widget,
+)
+
+from conftest import json_size
+
+pytest.importorskip("pytest_benchmark")
+
+WIDGETS = [
+    CurrentWeatherWidget,
+    AtmosphericConditionsWidgets,
+    TemperatureEvolutionWidget,
+    DailyForecastWidget,
+]
+WITH_CALLBACKS = [CurrentWeatherWidget, TemperatureEvolutionWidget, DailyForecastWidget]
+
+
+@pytest.mark.parametrize("widget_class", WIDGETS, ids=lambda cls: cls.__name__)
+def test_layout(benchmark, config: Widget.Config, widget_class: type[Widget]):
+    widget = widget_class(config)
+    layout = benchmark(widget.layout)
+    benchmark.extra_info["json_bytes"] = json_size(layout)
+
+
+@pytest.mark.parametrize("widget_class", WITH_CALLBACKS, ids=lambda cls: cls.__name__)
+def test_callback(benchmark, config: Widget.Config, widget_class: type[Widget]):
+    widget = widget_class(config)
+    widget.setup_callbacks(config.app)
+    (entry,) = [e for e in config.app.callback_map.values() if "callback" in e]
+    callback = getattr(entry["callback"], "__wrapped__", entry["callback"])
+    # Nothing else known, as on the first tick of a new client
+    others = [None] * (len(entry["inputs"]) - 1 + len(entry["state"]))
+
+    output = benchmark(callback, 1, *others)
+    benchmark.extra_info["json_bytes"] = json_size(output)
@@ -0,0 +1,97 @@
+"""Tailwind theme shared by the Dash figures.
+
+`assets/tailwind-config.js` is a plain object literal assigned to
+`tailwind.config`. Instead of evaluating it with a JavaScript interpreter,
+it is turned into JSON with a few substitutions, once, and the result is
+cached on disk for every process until the source file changes.
+
+Run `python -m meteo.app.theme` to build the cache ahead of time.
+"""
+
+import json
+import os
+import re
+
+CONFIG_PATH = os.path.join("assets", "tailwind-config.js")
+CACHE_PATH = ".theme-cache.json"
+
+# Strings come first, so that `//` in a URL is not taken for a comment
+_STRINGS_AND_COMMENTS = re.compile(
+    r"""(?P<double>"(?:[^"\\]|\\.)*")"""
+    r"""|'(?P<single>(?:[^'\\]|\\.)*)'"""
+    r"|//[^\n]*|/\*.*?\*/",
+    re.DOTALL,
+)
+_BARE_KEYS = re.compile(r"([{,]\s*)([A-Za-z_$][\w$-]*)\s*:")
+_TRAILING_COMMAS = re.compile(r",(\s*[}\]])")
+
+_config: dict | None = None
+_config_mtime: float | None = None
+
+
+def parse_tailwind_config(source: str) -> dict:
+    """Parses the object literal assigned to `tailwind.config` in `source`."""
+    source = _STRINGS_AND_COMMENTS.sub(_json_string, source)
+    source = source[source.index("{") : source.rindex("}") + 1]
+    source = _BARE_KEYS.sub(r'\1"\2":', source)
+    source = _TRAILING_COMMAS.sub(r"\1", source)
+    return json.loads(source)
+
+
+def _json_string(match: re.Match) -> str:
+    """Returns a string of `_STRINGS_AND_COMMENTS` as JSON, and comments as ''."""
+    if match.group("double") is not None:
+        return match.group("double")
+    if match.group("single") is not None:
+        return json.dumps(match.group("single"))
+    return ""
+
+
+def _read_cache(mtime: float) -> dict | None:
+    try:
+        with open(CACHE_PATH, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cache.get("source") != CONFIG_PATH or cache.get("mtime") != mtime:
+        return None
+    return cache.get("config")
+
+
+def _write_cache(mtime: float, config: dict) -> None:
+    tmp_path = f"{CACHE_PATH}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"source": CONFIG_PATH, "mtime": mtime, "config": config}, f)
+        # Atomic, so that concurrent workers never read a partial file
+        os.replace(tmp_path, CACHE_PATH)
+    except OSError as e:
+        print(f"Error writing Tailwind config cache: {e}")
+
+
+def load_tailwind_config() -> dict:
+    """Returns the Tailwind config, from memory, the disk cache or the source."""
+    global _config, _config_mtime
+    try:
+        mtime = os.path.getmtime(CONFIG_PATH)
+        if _config is not None and mtime == _config_mtime:
+            return _config
+        config = _read_cache(mtime)
+        if config is None:
+            with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+                config = parse_tailwind_config(f.read())
+            _write_cache(mtime, config)
+    except (OSError, ValueError) as e:
+        print(f"Error loading Tailwind config: {e}")
+        config, mtime = {}, None
+    _config, _config_mtime = config, mtime
+    return config
+
+
+def colors() -> dict[str, str]:
+    """Returns the custom colors of the theme."""
+    return load_tailwind_config().get("theme", {}).get("extend", {}).get("colors", {})
+
+
+if __name__ == "__main__":
+    print(json.dumps(load_tailwind_config(), indent=2))
@@ -1,3 +1,4 @@
+from .templates import ComponentTemplate, Slot
 from .widget import Widget
 from dash import html
 from dash_svg import Svg, Path
@@ -72,39 +73,55 @@ rising = Svg(
 
 
 class AtmosphericConditionsWidgets(Widget):
-    def _sub_widget_layout(
-        self,
-        icon: Svg,
-        label: str,
-        value: str,
-        unit: str,
-        section: bool = True,
-    ) -> html.Div:
-        """Returns the layout of a sub-widget for atmospheric conditions."""
-        container_classes = (
-            "bg-card border border-border rounded-xl p-5" if section else ""
-        )
-        return html.Div(
+    _SUB_WIDGET = ComponentTemplate(
+        html.Div(
             children=[
                 html.Div(
                     children=[
-                        icon,
+                        Slot("icon"),
                         html.Span(
-                            children=label,
+                            children=Slot("label"),
                             className="text-sm text-muted-foreground",
                         ),
                     ],
                     className="flex items-center gap-2 mb-3",
                 ),
                 html.Div(
-                    children=value,
+                    children=Slot("value"),
                     className="text-3xl font-bold mb-1",
                 ),
                 html.Span(
-                    children=unit,
+                    children=Slot("unit"),
                     className="text-sm text-secondary-foreground",
                 ),
             ],
+            className=Slot("className"),
+        )
+    )
+    _ICONS = {
+        "arrow": ComponentTemplate(arrow).fill(),
+        "cloud": ComponentTemplate(cloud).fill(),
+        "eye": ComponentTemplate(eye).fill(),
+        "rising": ComponentTemplate(rising).fill(),
+    }
+
+    def _sub_widget_layout(
+        self,
+        icon: str,
+        label: str,
+        value: str,
+        unit: str,
+        section: bool = True,
+    ) -> dict:
+        """Returns the layout of a sub-widget for atmospheric conditions."""
+        container_classes = (
+            "bg-card border border-border rounded-xl p-5" if section else ""
+        )
+        return self._SUB_WIDGET.fill(
+            icon=self._ICONS[icon],
+            label=label,
+            value=value,
+            unit=unit,
             className=container_classes,
         )
 
@@ -113,16 +130,16 @@ class AtmosphericConditionsWidgets(Widget):
         return html.Section(
             children=[
                 self._sub_widget_layout(
-                    label="Wind", value="12", unit="Km/h NW", icon=arrow
+                    label="Wind", value="12", unit="Km/h NW", icon="arrow"
                 ),
                 self._sub_widget_layout(
-                    label="Humidity", value="20", unit="%", icon=cloud
+                    label="Humidity", value="20", unit="%", icon="cloud"
                 ),
                 self._sub_widget_layout(
-                    label="Visibility", value="10", unit="Km", icon=eye
+                    label="Visibility", value="10", unit="Km", icon="eye"
                 ),
                 self._sub_widget_layout(
-                    label="Pressure", value="1000", unit="hectopascals", icon=rising
+                    label="Pressure", value="1000", unit="hectopascals", icon="rising"
                 ),
             ],
             className="grid grid-cols-2 md:grid-cols-4 gap-4 bg-transparent border-0",
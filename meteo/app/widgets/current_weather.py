@@ -1,10 +1,10 @@
 from gettext import gettext
 
-import datetime
 from meteo import defs
 from meteo.conditions import WeatherDescription, UvRisk
 from meteo.forecast import Forecast
-from dash import Input, Output, html, Dash
+from dash import Input, Output, State, html, Dash
+from dash.exceptions import PreventUpdate
 from .widget import Widget
 
 
@@ -20,6 +20,7 @@ class CurrentWeatherWidget(Widget):
             className="flex items-start gap-6",
             children=[
                 html.Img(
+                    id="current-weather-image",
                     src=weather_condition.image,
                     alt=weather_condition.description,
                     width="128",
@@ -52,9 +53,9 @@ class CurrentWeatherWidget(Widget):
 
     def layout(self, className: str = "") -> html.Tbody:
         """Returns the layout of the current weather widget."""
-        forecast = self.config.forecast
-        current_weather_data = forecast.fetch_current_weather()
-        daily_weather_data = forecast.fetch_daily_weather(forecast_days=1)[0]
+        snapshot = self.config.forecast.snapshot.peek()
+        current_weather_data = snapshot.current
+        daily_weather_data = snapshot.today()
         uv_risk = UvRisk.from_index(daily_weather_data.uv_index_max)
 
         return self._create_layout(
@@ -71,6 +72,7 @@ class CurrentWeatherWidget(Widget):
                                     children=gettext("High / Low"),
                                 ),
                                 html.Div(
+                                    id="high-low-temperature",
                                     className="text-2xl font-semibold",
                                     children=f"{round(daily_weather_data.temperature_max)}° / {round(daily_weather_data.temperature_min)}°",
                                 ),
@@ -98,20 +100,32 @@ class CurrentWeatherWidget(Widget):
             Output(defs.LAST_UPDATED_ID, "data"),
             Output("current-temperature", "children"),
             Output("current-weather-description", "children"),
+            Output("current-weather-image", "src"),
+            Output("current-weather-image", "alt"),
             Output("feels-like-temperature", "children"),
             Output("uv-index", "children"),
             Output("uv-index", "className"),
+            Output("high-low-temperature", "children"),
             Input("current-weather-interval", "n_intervals"),
+            State(defs.LAST_UPDATED_ID, "data"),
         )
-        def update_current_weather(n_intervals: int):
-            current_weather_data = self.config.forecast.fetch_current_weather()
-            daily_weather_data = self.config.forecast.fetch_daily_weather()[0]
+        def update_current_weather(n_intervals: int, last_updated: float | None):
+            snapshot = self.config.forecast.snapshot.get()
+            version = snapshot.version("current")
+            # Nothing to send until the current weather is fetched again, nor
+            # from a process which has yet to load what the client shows
+            if version is None or (
+                last_updated is not None and version <= last_updated
+            ):
+                raise PreventUpdate
+            current_weather_data = snapshot.current
+            daily_weather_data = snapshot.today()
             uv_risk = UvRisk.from_index(daily_weather_data.uv_index_max)
 
             temperature = f"{round(current_weather_data.temperature, 1)}°{current_weather_data.unit.upper()}"
-            description = WeatherDescription.get_condition(
+            weather_condition = WeatherDescription.get_condition(
                 current_weather_data.weather_code, not current_weather_data.is_day
-            ).description
+            )
             feels_like = gettext(
                 f"Feels like {round(current_weather_data.feels_like, 1)}°{current_weather_data.unit.upper()}"
             )
@@ -119,12 +133,16 @@ class CurrentWeatherWidget(Widget):
                 f"{round(daily_weather_data.uv_index_max)} {uv_risk.label.capitalize()}"
             )
             uv_index_class = f"text-2xl font-semibold text-accent text-{uv_risk.color}"
+            high_low = f"{round(daily_weather_data.temperature_max)}° / {round(daily_weather_data.temperature_min)}°"
 
             return (
-                datetime.datetime.now().timestamp(),
+                snapshot.version("current"),
                 temperature,
-                description,
+                weather_condition.description,
+                weather_condition.image,
+                weather_condition.description,
                 feels_like,
                 uv_index,
                 uv_index_class,
+                high_low,
             )
@@ -1,34 +1,95 @@
-from dash import html, Input, Output, State
+import datetime
+
+from dash import dcc, html, no_update, ALL, Input, Output, State
+from dash.exceptions import PreventUpdate
 
 from meteo import defs
 from meteo.conditions import WeatherDescription
 from meteo.forecast import Forecast
+from meteo.forecast.series import DailySeries
 
+from .templates import ComponentTemplate, Slot
 from .widget import Widget
 
 
 class DailyForecastWidget(Widget):
-    def _create_summary_card(self, data: Forecast.DailyWeather) -> html.Div:
-        weather_condition = WeatherDescription.get_condition(data.weather_code, False)
-        return html.Div(
+    DAYS = 7
+    DATE_ID = "daily-forecast-date"
+    IMAGE_ID = "daily-forecast-image"
+    TEMPERATURE_ID = "daily-forecast-temperature"
+    PRECIPITATION_ID = "daily-forecast-precipitation"
+    VERSION_ID = "daily-forecast-version"
+
+    _SUMMARY_CARD = ComponentTemplate(
+        html.Div(
             className="flex flex-col items-center gap-2 bg-secondary rounded-xl p-4",
             children=[
-                html.Div(data.date.strftime("%a. %d"), className="font-bold"),
-                html.Div(html.Img(src=weather_condition.image), className="text-3xl"),
                 html.Div(
-                    f"{round(data.temperature_min)} / {round(data.temperature_max)} °{data.unit}",
+                    Slot("date"),
+                    id={"type": DATE_ID, "index": Slot("index")},
+                    className="font-bold",
+                ),
+                html.Div(
+                    html.Img(
+                        src=Slot("image"),
+                        id={"type": IMAGE_ID, "index": Slot("index")},
+                    ),
+                    className="text-3xl",
+                ),
+                html.Div(
+                    Slot("temperature"),
+                    id={"type": TEMPERATURE_ID, "index": Slot("index")},
                     className="text-lg font-semibold grow w-full text-center",
                 ),
                 html.Div(
-                    f"☂️ {round(data.precipitation_probability, 1 if data.precipitation_probability > 0 else 0)}%",
+                    Slot("precipitation"),
+                    id={"type": PRECIPITATION_ID, "index": Slot("index")},
                     className="text-s text-cyan-500/75",
                 ),
             ],
         )
+    )
+
+    def _summary_leaves(
+        self,
+        date: datetime.date,
+        temperature_min: float,
+        temperature_max: float,
+        image: str,
+        precipitation_probability: float,
+        unit: str,
+    ) -> dict[str, str]:
+        """Returns the values of a summary card that change with the forecast."""
+        return {
+            "date": date.strftime("%a. %d"),
+            "image": image,
+            "temperature": f"{round(temperature_min)} / {round(temperature_max)} °{unit}",
+            "precipitation": f"☂️ {round(precipitation_probability, 1 if precipitation_probability > 0 else 0)}%",
+        }
+
+    def _summary_leaves_of(self, days: DailySeries) -> list[dict[str, str]]:
+        return [
+            self._summary_leaves(date, *values, days.unit)
+            for date, *values in zip(
+                days.dates.tolist(),
+                days.temperature_min.tolist(),
+                days.temperature_max.tolist(),
+                WeatherDescription.get_images(days.weather_code).tolist(),
+                days.precipitation_probability.tolist(),
+            )
+        ]
 
     def layout(self) -> html.Div:
         """Returns the layout of the daily forecast widget."""
-        data_all = [Forecast.DailyWeather() for _ in range(8)]
+        data = Forecast.DailyWeather()
+        leaves = self._summary_leaves(
+            data.date,
+            data.temperature_min,
+            data.temperature_max,
+            WeatherDescription.get_condition(data.weather_code, False).image,
+            data.precipitation_probability,
+            data.unit,
+        )
 
         return super()._create_layout(
             html.H2(
@@ -36,10 +97,13 @@ class DailyForecastWidget(Widget):
                 className="text-xl font-semibold mb-4",
             ),
             html.Spacer(),
+            dcc.Store(id=self.VERSION_ID, data=None),
             html.Div(
                 id="daily-forecast-container",
                 className="grid grid-cols-7 gap-4 overflow-x-auto pb-2",
-                children=[self._create_summary_card(data) for data in data_all[1:]],
+                children=[
+                    self._SUMMARY_CARD.fill(index=i, **leaves) for i in range(self.DAYS)
+                ],
             ),
         )
 
@@ -47,13 +111,47 @@ class DailyForecastWidget(Widget):
         super().setup_callbacks(app)
 
         @app.callback(
-            Output("daily-forecast-container", "children"),
+            Output({"type": self.DATE_ID, "index": ALL}, "children"),
+            Output({"type": self.IMAGE_ID, "index": ALL}, "src"),
+            Output({"type": self.TEMPERATURE_ID, "index": ALL}, "children"),
+            Output({"type": self.PRECIPITATION_ID, "index": ALL}, "children"),
+            Output(self.VERSION_ID, "data"),
             Input(defs.LONG_FORECAST_INTERVAL_ID, "n_intervals"),
+            # Checked every minute as well, for a page opened before the first
+            # fetch to get the forecast once it is there
+            Input(defs.WEATHER_UPDATE_INTERVAL_ID, "n_intervals"),
+            State(self.VERSION_ID, "data"),
         )
-        def update_daily_forecast(n_intervals: int):
-            data_all = self.config.forecast.fetch_daily_weather(forecast_days=8)
+        def update_daily_forecast(
+            n_intervals: int, n_updates: int, rendered_version: list | None
+        ):
+            snapshot = self.config.forecast.snapshot.get()
+            daily_version = snapshot.version("daily")
+            # Placeholder cards stay until the daily forecast is loaded, with
+            # no version for the client to hold on to meanwhile
+            if daily_version is None:
+                raise PreventUpdate
+            # The cards change with the date, and with a later daily forecast
+            # than the one rendered, which a process yet to load it lacks
+            today = datetime.date.today().isoformat()
+            if (
+                isinstance(rendered_version, list)
+                and rendered_version[0] == today
+                and rendered_version[1] >= daily_version
+            ):
+                raise PreventUpdate
+            upcoming_days = snapshot.upcoming_days(self.DAYS)
+            leaves = self._summary_leaves_of(upcoming_days)
+            # Only the changing leaves are sent, the cards themselves stay
+            leaves += [None] * (self.DAYS - len(leaves))
 
-            return [self._create_summary_card(data) for data in data_all[1:]]
+            return (
+                *(
+                    [day[name] if day else no_update for day in leaves]
+                    for name in ("date", "image", "temperature", "precipitation")
+                ),
+                [today, daily_version],
+            )
 
 
 __all__ = ["DailyForecastWidget"]
@@ -1,15 +1,33 @@
 import math
-from datetime import datetime
-from dash import dcc, html, Input, Output, State
+from datetime import datetime, timedelta
+from dash import dcc, html, no_update, ClientsideFunction, Input, Output, Patch, State
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 
 from meteo import defs
+from meteo.forecast.downsample import downsample
 from .widget import Widget
 
 
 class TemperatureEvolutionWidget(Widget):
     GRAPH_ID = "temperature-evolution-graph"
+    WIDTH_ID = "temperature-evolution-width"
+
+    def __init__(
+        self,
+        config: Widget.Config,
+        past_hours: int = defs.TEMPERATURE_PAST_HOURS,
+        forecast_hours: int = defs.TEMPERATURE_FORECAST_HOURS,
+    ):
+        """Graph of the temperature from `past_hours` ago to `forecast_hours` ahead."""
+        super().__init__(config)
+        self.past_hours = past_hours
+        self.forecast_hours = forecast_hours
+        # Make sure the shared snapshot covers the whole window
+        snapshot = config.forecast.snapshot
+        snapshot.past_hours = max(snapshot.past_hours, past_hours)
+        snapshot.forecast_hours = max(snapshot.forecast_hours, forecast_hours)
 
     def layout(self) -> html.Div:
         """Returns the layout of the temperature evolution widget."""
@@ -21,6 +39,7 @@ class TemperatureEvolutionWidget(Widget):
         accent_color = colors.get("accent", "#FFFFFF")
 
         return super()._create_layout(
+            dcc.Store(id=self.WIDTH_ID, data=None),
             dcc.Graph(
                 id=self.GRAPH_ID,
                 className="graph-container",
@@ -79,43 +98,56 @@ class TemperatureEvolutionWidget(Widget):
             ),
         )
 
+    @staticmethod
+    def _budget(width: int | None) -> int:
+        """Returns how many points to draw on a graph `width` pixels wide."""
+        points = (width or defs.GRAPH_DEFAULT_WIDTH_PX) * defs.GRAPH_POINTS_PER_PIXEL
+        return int(min(max(points, defs.GRAPH_MIN_POINTS), defs.GRAPH_MAX_POINTS))
+
     def setup_callbacks(self, app):
         super().setup_callbacks(app)
 
+        # Width of the graph in pixels, measured in the browser
+        app.clientside_callback(
+            ClientsideFunction(namespace="meteo", function_name="elementWidth"),
+            Output(self.WIDTH_ID, "data"),
+            Input(defs.FAST_REFRESH_INTERVAL_ID, "n_intervals"),
+            State(self.GRAPH_ID, "id"),
+            State(self.WIDTH_ID, "data"),
+        )
+
         @app.callback(
             Output(self.GRAPH_ID, "figure"),
             Input(defs.WEATHER_UPDATE_INTERVAL_ID, "n_intervals"),
-            State(self.GRAPH_ID, "figure"),
+            Input(self.WIDTH_ID, "data"),
         )
-        def update_temperature_graph(n_intervals, existing_figure):
-            forecast = self.config.forecast
-            hourly_data = forecast.fetch_hourly_weather(past_days=1, forecast_days=1)
-            # print(hourly_data[0:5])  # Print first 5 entries for debugging
-            # return existing_figure
-
-            fig = existing_figure
-            fig["data"][0]["x"] = [
-                data.time
-                for data in hourly_data
-                if data.time >= datetime.now() - pd.Timedelta(hours=6)
-            ]
-            fig["data"][0]["y"] = [
-                data.temperature_2m
-                for data in hourly_data
-                if data.time >= datetime.now() - pd.Timedelta(hours=6)
-            ]
-            max_temp = max(
-                data.temperature_2m
-                for data in hourly_data
-                if data.time >= datetime.now() - pd.Timedelta(hours=6)
+        def update_temperature_graph(n_intervals, width: int | None):
+            now = datetime.now()
+            # Hours older than the snapshot's come from the local store
+            hourly_data = self.config.forecast.snapshot.hourly_window(
+                start=now - timedelta(hours=self.past_hours),
+                end=now + timedelta(hours=self.forecast_hours),
             )
-            min_temp = min(
-                data.temperature_2m
-                for data in hourly_data
-                if data.time >= datetime.now() - pd.Timedelta(hours=6)
+            if not len(hourly_data):
+                return no_update
+            # No more points than pixels, whatever the time range; the
+            # extremes are kept, for the "now" marker to span the same range
+            kept = downsample(
+                hourly_data.epoch, hourly_data.temperature_2m, self._budget(width)
             )
-            fig["data"][1]["x"] = [datetime.now(), datetime.now()]
-            fig["data"][1]["y"] = [min_temp - 1, max_temp + 1]
+            temperatures = hourly_data.temperature_2m[kept].astype(float).round(1)
+
+            # Only send the arrays that change, the rest of the figure stays
+            # as is on the client. The whole window is replaced rather than
+            # extended: forecast hours are revised by every model run.
+            fig = Patch()
+            fig["data"][0]["x"] = hourly_data.local_time()[kept].astype("datetime64[m]")
+            fig["data"][0]["y"] = temperatures
+            fig["data"][1]["x"] = [now, now]
+            fig["data"][1]["y"] = [
+                np.nanmin(temperatures) - 1,
+                np.nanmax(temperatures) + 1,
+            ]
 
             return fig
 
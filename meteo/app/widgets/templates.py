@@ -0,0 +1,79 @@
+from typing import Any
+
+from dash.development.base_component import Component
+
+
+class Slot(str):
+    """Placeholder for a value filled in each time a template is used.
+
+    Slots are strings so that Dash accepts them anywhere, ids included.
+    """
+
+    __slots__ = ()
+
+    @property
+    def name(self) -> str:
+        return str(self)
+
+    def __repr__(self) -> str:
+        return f"Slot({self.name!r})"
+
+
+class _Dynamic:
+    """Container of the compiled tree with at least one slot below it."""
+
+    __slots__ = ("items", "is_dict")
+
+    def __init__(self, items: dict | list, is_dict: bool):
+        self.items = items
+        self.is_dict = is_dict
+
+
+class ComponentTemplate:
+    """Component subtree built once, of which only the slots are filled per call.
+
+    The invariant structure is serialized once into the JSON form Dash sends to
+    the browser. Filling the template only rebuilds the containers leading to a
+    slot: everything else (class strings, SVG icons, ...) is shared by every
+    filled copy instead of being rebuilt and validated on every call.
+
+    Example:
+        card = ComponentTemplate(html.Div(Slot("text"), className="card"))
+        card.fill(text="Hello")
+    """
+
+    def __init__(self, component: Component):
+        self._tree = self._compile(component)
+
+    def fill(self, **values: Any) -> dict:
+        """Returns a copy of the component with its slots set to `values`."""
+        return self._fill(self._tree, values)
+
+    @classmethod
+    def _compile(cls, node: Any) -> Any:
+        if isinstance(node, Component):
+            node = node.to_plotly_json()
+        if isinstance(node, Slot):
+            return node
+        if isinstance(node, dict):
+            items = {key: cls._compile(value) for key, value in node.items()}
+        elif isinstance(node, (list, tuple)):
+            items = [cls._compile(value) for value in node]
+        else:
+            return node
+        values = items.values() if isinstance(items, dict) else items
+        if any(isinstance(value, (Slot, _Dynamic)) for value in values):
+            return _Dynamic(items, isinstance(items, dict))
+        return items
+
+    @classmethod
+    def _fill(cls, node: Any, values: dict) -> Any:
+        if isinstance(node, Slot):
+            return values[node.name]
+        if isinstance(node, _Dynamic):
+            if node.is_dict:
+                return {
+                    key: cls._fill(value, values) for key, value in node.items.items()
+                }
+            return [cls._fill(value, values) for value in node.items]
+        return node
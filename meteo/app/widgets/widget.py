@@ -1,6 +1,6 @@
 import dataclasses
 from dash import html, Dash
-import js2py
+from meteo.app import theme
 from meteo.forecast import Forecast
 
 
@@ -16,16 +16,7 @@ class Widget:
         self.config = config
 
     def _load_tailwind_config(self) -> None:
-        if not self._tailwind_config:
-            try:
-                context = js2py.EvalJs()
-                with open("assets/tailwind-config.js", "r") as f:
-                    js_code = f.read().replace("tailwind.config =", "tailwind_config =")
-                    context.execute(js_code)
-                self._tailwind_config = context["tailwind_config"].to_dict()
-            except Exception as e:
-                print(f"Error loading Tailwind config: {e}")
-                self._tailwind_config = {}
+        self._tailwind_config = theme.load_tailwind_config()
 
     def _create_layout(
         self, *children: list[html.Tbody], className: str = "", section: bool = True
@@ -0,0 +1,65 @@
+"""Compression of the JSON responses of the app.
+
+Callback responses are JSON of a few kilobytes, repeated on every interval
+tick of every client, and compress to a fraction of their size. Responses
+are encoded with Brotli when the `brotli` package is installed and the
+client accepts it, with gzip otherwise.
+
+Static assets, such as the megabytes of plotly.js, are left to a reverse
+proxy or CDN that can compress them once rather than on every request.
+
+Usage:
+    compression.init_app(server)
+"""
+
+import gzip
+
+from flask import Flask, Response, request
+
+from meteo import defs
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _accepts(encoding: str) -> bool:
+    return request.accept_encodings[encoding] > 0
+
+
+def compress(
+    response: Response, min_size: int = defs.COMPRESSION_MIN_BYTES
+) -> Response:
+    """Compresses `response` in place, when the client and the response allow it."""
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or not response.is_json
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+    if brotli is not None and _accepts("br"):
+        encoding = "br"
+        data = brotli.compress(data, quality=defs.BROTLI_QUALITY)
+    elif _accepts("gzip"):
+        encoding = "gzip"
+        data = gzip.compress(data, compresslevel=defs.GZIP_LEVEL, mtime=0)
+    else:
+        return response
+    response.set_data(data)
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_app(server: Flask) -> None:
+    """Compresses the responses of `server`.
+
+    Register it after the other `after_request` hooks: Flask runs them in
+    reverse order, so they see the compressed response.
+    """
+    server.after_request(compress)
@@ -1,9 +1,12 @@
 from dataclasses import dataclass
 import os
 import json
+import sys
 
+import numpy as np
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class WeatherCondition:
     code: int
     description: str
@@ -11,27 +14,93 @@ class WeatherCondition:
 
 
 class WeatherDescription:
-    """A class to get weather descriptions based on weather codes."""
+    """A class to get weather descriptions based on weather codes.
+
+    The descriptions are compiled once, at import, into a table indexed by
+    day/night and WMO code holding one shared `WeatherCondition` per entry.
+    Lookups allocate nothing, and whole arrays of codes are mapped at once.
+    """
 
     JSON_PATH = os.path.join(os.path.dirname(__file__), "weather_descriptions.json")
-    _descriptions = None
+    # WMO weather codes range from 0 to 99
+    CODES = 100
+    DEFAULT_DESCRIPTION = "No description available"
+    DEFAULT_IMAGE = "unknown.png"
+
+    # Shape (2, CODES + 1): day then night, the last column for unknown codes
+    _conditions: np.ndarray
+    _descriptions: np.ndarray
+    _images: np.ndarray
+    _rows: tuple[list[WeatherCondition], list[WeatherCondition]]
 
     @classmethod
-    def _load_descriptions(cls):
-        if cls._descriptions is None:
-            with open(cls.JSON_PATH, "r", encoding="utf-8") as f:
-                cls._descriptions = json.load(f)
+    def _compile(cls) -> None:
+        with open(cls.JSON_PATH, "r", encoding="utf-8") as f:
+            descriptions = json.load(f)
+
+        conditions = np.empty((2, cls.CODES + 1), dtype=object)
+        for code in range(cls.CODES + 1):
+            entry = descriptions.get(str(code), {})
+            for row, period in enumerate(("day", "night")):
+                desc = entry.get(period, {})
+                conditions[row, code] = WeatherCondition(
+                    code=code,
+                    description=sys.intern(
+                        desc.get("description", cls.DEFAULT_DESCRIPTION)
+                    ),
+                    image=sys.intern(desc.get("image", cls.DEFAULT_IMAGE)),
+                )
+        cls._conditions = conditions
+        cls._descriptions = np.vectorize(lambda c: c.description, otypes=[object])(
+            conditions
+        )
+        cls._images = np.vectorize(lambda c: c.image, otypes=[object])(conditions)
+        # Plain lists are faster than NumPy to index with a single code
+        cls._rows = (list(conditions[0]), list(conditions[1]))
 
     @classmethod
     def get_condition(cls, weather_code: int, is_night: bool) -> WeatherCondition:
-        cls._load_descriptions()
-        desc = cls._descriptions.get(str(int(weather_code)), {})
-        if is_night:
-            desc = desc.get("night")
-        else:
-            desc = desc.get("day")
-        return WeatherCondition(
-            code=weather_code,
-            description=desc.get("description", "No description available"),
-            image=desc.get("image", "unknown.png"),
-        )
+        code = int(weather_code)
+        if not 0 <= code < cls.CODES:
+            code = cls.CODES
+        return cls._rows[bool(is_night)][code]
+
+    @classmethod
+    def _indices(
+        cls, weather_codes: np.ndarray, is_night: bool | np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        codes = np.asarray(weather_codes, dtype=float)
+        known = np.isfinite(codes) & (codes >= 0) & (codes < cls.CODES)
+        columns = np.where(known, codes, cls.CODES).astype(np.intp)
+        rows = np.broadcast_to(np.asarray(is_night, dtype=np.intp), columns.shape)
+        return rows, columns
+
+    @classmethod
+    def get_conditions(
+        cls, weather_codes: np.ndarray, is_night: bool | np.ndarray = False
+    ) -> np.ndarray:
+        """Returns the condition of every weather code, as an object array.
+
+        Args:
+            weather_codes (np.ndarray): WMO codes, NaN or unknown codes allowed.
+            is_night (bool | np.ndarray, optional): Whether to use the night
+                conditions, for all codes or for each of them. Defaults to False.
+        """
+        return cls._conditions[cls._indices(weather_codes, is_night)]
+
+    @classmethod
+    def get_descriptions(
+        cls, weather_codes: np.ndarray, is_night: bool | np.ndarray = False
+    ) -> np.ndarray:
+        """Returns the description of every weather code, as an object array."""
+        return cls._descriptions[cls._indices(weather_codes, is_night)]
+
+    @classmethod
+    def get_images(
+        cls, weather_codes: np.ndarray, is_night: bool | np.ndarray = False
+    ) -> np.ndarray:
+        """Returns the image URL of every weather code, as an object array."""
+        return cls._images[cls._indices(weather_codes, is_night)]
+
+
+WeatherDescription._compile()
@@ -1,25 +1,54 @@
+import bisect
 from gettext import gettext
 from dataclasses import dataclass
 
+import numpy as np
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class UvRisk:
     lower_bound: float
     upper_bound: float
     label: str
     color: str
 
-    _UV_RISK_LEVELS = [
-        (-float("inf"), 2, gettext("Low"), "green-300"),
-        (3, 5, gettext("Moderate"), "yellow-400"),
-        (6, 7, gettext("High"), "orange-400"),
-        (8, 10, gettext("Very High"), "red-400"),
-        (11, float("inf"), gettext("Extreme"), "violet-400"),
-    ]
-
     @staticmethod
-    def from_index(uv_index: float) -> "UvRisk":
-        for lower, upper, label, color in UvRisk._UV_RISK_LEVELS:
-            if lower <= uv_index <= upper:
-                return UvRisk(lower, upper, label, color)
-        raise ValueError("UV index out of range")
+    def from_index(uv_index: float | np.ndarray) -> "UvRisk | np.ndarray":
+        """Returns the risk of a UV index, or of every index of an array.
+
+        The index is rounded first, like it is displayed, so that 2.6 shown as
+        3 is Moderate rather than Low. Halves round to even, like `round`.
+        Risks are shared instances.
+
+        Args:
+            uv_index (float | np.ndarray): A UV index or an array of them.
+
+        Returns:
+            UvRisk | np.ndarray: The risk, or an object array of risks with
+                None where the index is NaN.
+
+        Raises:
+            ValueError: If a scalar UV index is NaN.
+        """
+        if np.isscalar(uv_index):
+            if uv_index != uv_index:
+                raise ValueError("UV index is not a number")
+            # A bisect of the same edges, NumPy calls cost more on one value
+            return _UV_RISKS[bisect.bisect_right(_UV_RISK_BOUNDS, round(uv_index))]
+        indices = np.rint(np.asarray(uv_index, dtype=float))
+        bands = np.searchsorted(_UV_RISK_EDGES, indices, side="right")
+        return np.where(np.isnan(indices), None, _UV_RISKS_ARRAY[bands])
+
+
+_UV_RISKS = (
+    UvRisk(-float("inf"), 3, gettext("Low"), "green-300"),
+    UvRisk(3, 6, gettext("Moderate"), "yellow-400"),
+    UvRisk(6, 8, gettext("High"), "orange-400"),
+    UvRisk(8, 11, gettext("Very High"), "red-400"),
+    UvRisk(11, float("inf"), gettext("Extreme"), "violet-400"),
+)
+# Lower bounds of every band but the first, in increasing order
+_UV_RISK_BOUNDS = tuple(risk.lower_bound for risk in _UV_RISKS[1:])
+_UV_RISK_EDGES = np.array(_UV_RISK_BOUNDS)
+_UV_RISKS_ARRAY = np.empty(len(_UV_RISKS), dtype=object)
+_UV_RISKS_ARRAY[:] = _UV_RISKS
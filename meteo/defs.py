@@ -1,3 +1,5 @@
+import os
+
 WEATHER_UPDATE_INTERVAL_ID = "current-weather-interval"
 WEATHER_UPDATE_INTERVAL_MS = 1 * 60 * 1000  # 1 minutes
 
@@ -8,3 +10,56 @@ LONG_FORECAST_INTERVAL_ID = "long-forecast-interval"
 LONG_FORECAST_INTERVAL_MS = 3 * 60 * 60 * 1000  # 3 hours
 
 LAST_UPDATED_ID = "last-updated-store"
+LAST_UPDATED_TRANSLATIONS_ID = "last-updated-translations"
+
+LOCALES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "locales"
+)
+
+# Server-side refresh cadence of each forecast tier
+CURRENT_REFRESH_INTERVAL_S = 60  # 1 minute
+HOURLY_REFRESH_INTERVAL_S = 15 * 60  # 15 minutes
+DAILY_REFRESH_INTERVAL_S = 3 * 60 * 60  # 3 hours
+REFRESH_JITTER = 0.1  # +/- 10% of the cadence
+
+# Time window of the temperature evolution graph, around the current time
+TEMPERATURE_PAST_HOURS = 6
+TEMPERATURE_FORECAST_HOURS = 24
+
+# Points drawn per pixel of graph width, within bounds, so that the payload of
+# a graph does not grow with its time range
+GRAPH_POINTS_PER_PIXEL = 1
+GRAPH_DEFAULT_WIDTH_PX = 800  # until the browser measured the graph
+GRAPH_MIN_POINTS = 50
+GRAPH_MAX_POINTS = 2000
+
+# Time-to-live of cached API responses of each forecast tier, for callbacks
+# fetching inline. Scheduled refreshes skip the cache and always fetch upstream
+CURRENT_CACHE_TTL_S = 45  # 45 seconds
+HOURLY_CACHE_TTL_S = 10 * 60  # 10 minutes
+DAILY_CACHE_TTL_S = 2 * 60 * 60  # 2 hours
+CACHE_STALE_WHILE_REVALIDATE_S = 5 * 60  # 5 minutes
+# Path of the cache of API responses, without the extension of its backend
+CACHE_NAME = os.environ.get("METEO_CACHE_NAME", ".cache")
+
+# Open-Meteo forecast endpoint, which can point at a local stand-in such as
+# `python -m meteo.forecast.replay`
+OPEN_METEO_URL = os.environ.get(
+    "OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast"
+)
+
+# Local store of the fetched hourly and daily series, for history and warm
+# restarts, empty to disable it
+FORECAST_STORE_DIR = os.environ.get("METEO_STORE_DIR", ".forecast-store")
+# How often the processes not refreshing the forecast load it from the store
+SHARED_POLL_INTERVAL_S = 5  # 5 seconds
+
+# Compression of JSON responses, smaller ones are not worth the CPU time
+COMPRESSION_MIN_BYTES = 512
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Sampling profiler of callback requests, disabled without a token
+PROFILE_TOKEN = os.environ.get("METEO_PROFILE_TOKEN")
+PROFILES_DIR = "profiles"
+PROFILE_INTERVAL_S = 0.001  # 1 millisecond
@@ -1,6 +1,13 @@
+import os
+
+from babel.messages.pofile import read_po
 from flask import request
 from flask_babel import Babel
 
+from meteo import defs
+
+SOURCE_LOCALE = "en"
+
 
 def get_locale():
     lang = request.accept_languages.best_match(["en", "fr"])
@@ -8,4 +15,32 @@ def get_locale():
     return lang
 
 
+def N_(message: str) -> str:
+    """Marks a message for extraction, for it to be translated elsewhere."""
+    return message
+
+
+def load_catalogs(
+    messages: list[str], directory: str = defs.LOCALES_DIR
+) -> dict[str, dict[str, str]]:
+    """Returns the translations of `messages` in every locale, by locale.
+
+    Used to ship translations to clientside callbacks. The source locale has
+    an empty catalog, messages being their own translation.
+    """
+    catalogs = {SOURCE_LOCALE: {}}
+    for locale in sorted(os.listdir(directory)):
+        path = os.path.join(directory, locale, "LC_MESSAGES", "messages.po")
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            catalog = read_po(f, locale=locale)
+        catalogs[locale] = {
+            message: catalog[message].string
+            for message in messages
+            if message in catalog and catalog[message].string
+        }
+    return catalogs
+
+
 babel = Babel()
@@ -1,3 +1,13 @@
+from .async_forecast import AsyncForecast
 from .forecast import Forecast
+from .pool import ForecastPool
+from .scheduler import RefreshScheduler
+from .snapshot import ForecastSnapshot
 
-__all__ = ["Forecast"]
+__all__ = [
+    "AsyncForecast",
+    "Forecast",
+    "ForecastPool",
+    "ForecastSnapshot",
+    "RefreshScheduler",
+]
@@ -0,0 +1,233 @@
+import asyncio
+import datetime
+import threading
+from typing import Any, Coroutine, Iterable
+
+import niquests
+import openmeteo_requests
+from niquests.packages.urllib3 import Retry
+from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
+
+from meteo import metrics
+
+from .cache import CacheConfig, ResponseCache, request_key
+from .forecast import Forecast
+from .singleflight import SingleFlight
+from .snapshot import ForecastSnapshot
+
+
+class AsyncForecast(Forecast):
+    """Forecast fetching its tiers, and many locations, concurrently.
+
+    Each tier is its own request, sent through `openmeteo_requests.AsyncClient`
+    over one pooled `niquests.AsyncSession`: all requests of a refresh are in
+    flight at once, as HTTP/2 streams when the server offers it, so refreshing
+    every tier of every location costs about one round-trip instead of one each.
+
+    The event loop runs in a daemon thread. The synchronous `Forecast` API stays
+    available on top of it for the widgets and the refresh scheduler: each call
+    is submitted to the loop and waited on.
+
+    Responses are cached in memory with the TTLs and stale-while-revalidate
+    window of `cache_config`, and failed requests are retried like `Forecast`.
+    """
+
+    MAX_CONNECTIONS = 100
+
+    async_session: niquests.AsyncSession
+    async_openmeteo: openmeteo_requests.AsyncClient
+    response_cache: ResponseCache
+    single_flight: SingleFlight = SingleFlight()
+    _loop: asyncio.AbstractEventLoop | None = None
+    _revalidating: dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def setup_client(cls, cache_config: CacheConfig | None = None) -> None:
+        """Setup the asynchronous client, its event loop thread and cache."""
+        if cache_config is not None:
+            cls.cache_config = cache_config
+        if cls._loop is None:
+            cls._loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=cls._loop.run_forever, name="forecast-loop", daemon=True
+            ).start()
+        cls.response_cache = ResponseCache(cls.cache_config)
+        cls.run(cls._setup_session())
+
+    @classmethod
+    async def _setup_session(cls) -> None:
+        retries = Retry(
+            total=cls.RETRIES,
+            read=cls.RETRIES,
+            connect=cls.RETRIES,
+            backoff_factor=cls.BACKOFF_FACTOR,
+            status_forcelist=(500, 502, 504),
+            allowed_methods=None,
+        )
+        # Not `multiplexed`: it sends requests one after the other over HTTP/1.1
+        cls.async_session = niquests.AsyncSession(
+            pool_maxsize=cls.MAX_CONNECTIONS, retries=retries
+        )
+        cls.async_openmeteo = openmeteo_requests.AsyncClient(cls.async_session)
+
+    @classmethod
+    def run(cls, coroutine: Coroutine) -> Any:
+        """Runs a coroutine on the client's event loop and waits for its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, cls._loop).result()
+
+    @classmethod
+    async def arequest(
+        cls, params: dict, tiers: Iterable[str], refresh: bool = False
+    ) -> tuple[list[WeatherApiResponse], datetime.datetime]:
+        """Request the API, caching the response for the TTL of its tiers.
+
+        A stale response is returned at once while it is fetched again in the
+        background, unless `refresh` asks for a fresh response.
+
+        Returns:
+            tuple: The responses, and when they were fetched upstream.
+        """
+        tiers = tuple(tiers)
+        key = request_key(cls.URL, params)
+        cached = None if refresh else cls.response_cache.get(key)
+        if cached is None:
+            with metrics.FETCH_DURATION.time(tiers=",".join(tiers)):
+                return await cls.single_flight.ado(
+                    # A refresh must not get the cached response of another call
+                    f"{key}#refresh" if refresh else key,
+                    cls._fetch,
+                    key,
+                    params,
+                    tiers,
+                )
+        fetched, stale = cached
+        if stale and key not in cls._revalidating:
+            task = asyncio.create_task(
+                cls.single_flight.ado(key, cls._fetch, key, params, tiers)
+            )
+            cls._revalidating[key] = task
+            task.add_done_callback(lambda _: cls._revalidating.pop(key, None))
+        return fetched
+
+    @classmethod
+    async def _fetch(
+        cls, key: str, params: dict, tiers: tuple[str, ...]
+    ) -> tuple[list[WeatherApiResponse], datetime.datetime]:
+        responses = await cls.async_openmeteo.weather_api(cls.URL, params=params)
+        fetched = responses, datetime.datetime.now()
+        cls.response_cache.set(key, fetched, cls.cache_config.ttl(tiers))
+        return fetched
+
+    @classmethod
+    def fetch(
+        cls, params: dict, tiers: Iterable[str], refresh: bool = False
+    ) -> tuple[list[WeatherApiResponse], datetime.datetime]:
+        return cls.run(cls.arequest(params, tiers, refresh))
+
+    @classmethod
+    async def afetch(
+        cls,
+        snapshots: list[ForecastSnapshot],
+        tiers: Iterable[str],
+        batch_size: int = 100,
+        refresh: bool = False,
+    ) -> list[dict[str, tuple[WeatherApiResponse, datetime.datetime] | Exception]]:
+        """Fetches each tier of every snapshot, all requests running concurrently.
+
+        Locations are batched `batch_size` at a time into a single request per
+        tier, like `ForecastPool` does.
+
+        Returns:
+            list: For each snapshot, the response of each tier and when it was
+                fetched upstream, or the error of the request which failed.
+        """
+        tiers = tuple(tiers)
+        batches = [
+            range(start, min(start + batch_size, len(snapshots)))
+            for start in range(0, len(snapshots), batch_size)
+        ]
+        jobs = [(batch, tier) for batch in batches for tier in tiers]
+        results = await asyncio.gather(
+            *(
+                cls.arequest(
+                    cls._params([snapshots[i] for i in batch], tier), [tier], refresh
+                )
+                for batch, tier in jobs
+            ),
+            return_exceptions=True,
+        )
+
+        fetched: list[dict] = [{} for _ in snapshots]
+        for (batch, tier), result in zip(jobs, results):
+            if not isinstance(result, Exception) and len(result[0]) != len(batch):
+                result = ValueError(
+                    f"Expected {len(batch)} responses, got {len(result[0])}"
+                )
+            for position, i in enumerate(batch):
+                fetched[i][tier] = (
+                    result
+                    if isinstance(result, Exception)
+                    else (result[0][position], result[1])
+                )
+        return fetched
+
+    @classmethod
+    async def arefresh(
+        cls,
+        snapshots: list[ForecastSnapshot],
+        tiers: Iterable[str] = ForecastSnapshot.TIERS,
+        batch_size: int = 100,
+    ) -> None:
+        """Fetches the given tiers of every snapshot and merges them in.
+
+        A failed tier keeps its previous values and records the error on the
+        snapshot, while the tiers which succeeded are still merged.
+        """
+        tiers = tuple(
+            dict.fromkeys(t for s in snapshots for t in s.tiers_to_fetch(tiers))
+        )
+        fetched = await cls.afetch(snapshots, tiers, batch_size, refresh=True)
+        for snapshot, results in zip(snapshots, fetched):
+            errors = {t: r for t, r in results.items() if isinstance(r, Exception)}
+            responses, fetched_at = _split(
+                {t: r for t, r in results.items() if t not in errors}
+            )
+            # An empty snapshot can only be filled with every tier at once
+            if responses and (not errors or snapshot.peek().loaded):
+                snapshot.merge(responses, fetched_at)
+            if errors:
+                try:
+                    snapshot.fail(errors, next(iter(errors.values())))
+                except Exception:
+                    pass
+
+    @classmethod
+    def refresh_all(
+        cls,
+        snapshots: list[ForecastSnapshot],
+        tiers: Iterable[str] = ForecastSnapshot.TIERS,
+        batch_size: int = 100,
+    ) -> None:
+        cls.run(cls.arefresh(snapshots, tiers, batch_size))
+
+    def fetch_tiers(
+        self, snapshot: ForecastSnapshot, tiers: Iterable[str], refresh: bool = False
+    ) -> tuple[dict[str, WeatherApiResponse], datetime.datetime]:
+        """Fetches the given tiers of a snapshot, one concurrent request each."""
+        fetched = self.run(self.afetch([snapshot], tiers, refresh=refresh))[0]
+        for result in fetched.values():
+            if isinstance(result, Exception):
+                raise result
+        return _split(fetched)
+
+    @staticmethod
+    def _params(snapshots: list[ForecastSnapshot], tier: str) -> dict:
+        return ForecastSnapshot.batch_params(snapshots, [tier])
+
+
+def _split(
+    fetched: dict[str, tuple[WeatherApiResponse, datetime.datetime]],
+) -> tuple[dict[str, WeatherApiResponse], datetime.datetime | None]:
+    """Returns the response of each tier, and when the oldest one was fetched."""
+    responses = {tier: response for tier, (response, _) in fetched.items()}
+    return responses, min((at for _, at in fetched.values()), default=None)
@@ -0,0 +1,210 @@
+import dataclasses
+import datetime
+import threading
+from typing import Any, Iterable, Literal
+from urllib.parse import urlencode
+
+import requests_cache
+from requests_cache.backends.base import BaseCache, DictStorage
+
+from meteo import defs, metrics
+
+
+def request_key(url: str, params: dict) -> str:
+    """Returns the key of a request, whatever the order of its parameters."""
+    return f"{url}?" + urlencode(
+        sorted(
+            (
+                name,
+                (
+                    ",".join(map(str, value))
+                    if isinstance(value, (list, tuple))
+                    else str(value)
+                ),
+            )
+            for name, value in params.items()
+        )
+    )
+
+
+@dataclasses.dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    bytes_served: int = 0
+    bytes_fetched: int = 0
+    bytes_stored: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LRUStorage(DictStorage):
+    """In-memory response storage evicting the least recently used entries."""
+
+    def __init__(self, max_entries: int, stats: CacheStats, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_entries = max_entries
+        self.stats = stats
+
+    def __getitem__(self, key):
+        item = super().__getitem__(key)
+        # Dicts keep insertion order: re-inserting marks the entry as recent
+        self.data[key] = self.data.pop(key)
+        return item
+
+    def __setitem__(self, key, value):
+        if key in self.data:
+            self.stats.bytes_stored -= self._size(self.data.pop(key))
+        self.data[key] = value
+        self.stats.bytes_stored += self._size(value)
+        while len(self.data) > self.max_entries:
+            oldest = next(iter(self.data))
+            self.stats.bytes_stored -= self._size(self.data.pop(oldest))
+            self.stats.evictions += 1
+
+    def __delitem__(self, key):
+        self.stats.bytes_stored -= self._size(self.data.pop(key))
+
+    @staticmethod
+    def _size(value) -> int:
+        return len(getattr(value, "content", None) or b"")
+
+
+class StatsCachedSession(requests_cache.CachedSession):
+    """Cached session counting hits, misses and bytes of every response."""
+
+    def __init__(self, *args, stats: CacheStats, **kwargs):
+        self.stats = stats
+        self._local = threading.local()
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        size = len(response.content or b"")
+        from_cache = getattr(response, "from_cache", False)
+        self._local.created_at = getattr(response, "created_at", None)
+        if from_cache:
+            self.stats.hits += 1
+        else:
+            self.stats.misses += 1
+            self.stats.bytes_fetched += size
+        self.stats.bytes_served += size
+        metrics.CACHE_REQUESTS.inc(result="hit" if from_cache else "miss")
+        metrics.UPSTREAM_RESPONSE_BYTES.observe(
+            size, cache="hit" if from_cache else "miss"
+        )
+        return response
+
+    def last_created_at(self) -> datetime.datetime:
+        """Returns when the last response sent to this thread was fetched upstream.
+
+        A cached response was fetched before it was served. The time is local
+        and naive, like the fetch times of `ForecastSnapshot`.
+        """
+        # Read once, not to be mistaken for the time of a later response
+        created_at = vars(self._local).pop("created_at", None)
+        if created_at is None:
+            return datetime.datetime.now()
+        return created_at.astimezone().replace(tzinfo=None)
+
+
+@dataclasses.dataclass
+class CacheConfig:
+    """How Open-Meteo responses are cached.
+
+    Each tier has its own time-to-live. A request spanning several tiers
+    expires with the shortest one. Once expired, a response is still served
+    for `stale_while_revalidate` while a fresh one is fetched in the background,
+    except to scheduled refreshes, which always fetch upstream.
+
+    Backends:
+        sqlite: persistent, `<cache_name>.sqlite` file (default).
+        filesystem: persistent, one file per response in `<cache_name>/`.
+        memory: per-process LRU holding at most `max_entries` responses.
+    """
+
+    backend: Literal["sqlite", "filesystem", "memory"] = "sqlite"
+    cache_name: str = defs.CACHE_NAME
+    ttls: dict[str, datetime.timedelta] = dataclasses.field(
+        default_factory=lambda: {
+            "current": datetime.timedelta(seconds=defs.CURRENT_CACHE_TTL_S),
+            "hourly": datetime.timedelta(seconds=defs.HOURLY_CACHE_TTL_S),
+            "daily": datetime.timedelta(seconds=defs.DAILY_CACHE_TTL_S),
+        }
+    )
+    max_entries: int = 256
+    stale_while_revalidate: datetime.timedelta | bool = datetime.timedelta(
+        seconds=defs.CACHE_STALE_WHILE_REVALIDATE_S
+    )
+    stats: CacheStats = dataclasses.field(default_factory=CacheStats)
+
+    def ttl(self, tiers: Iterable[str]) -> datetime.timedelta:
+        """Returns the time-to-live of a response holding the given tiers."""
+        return min(
+            (self.ttls[tier] for tier in tiers),
+            default=min(self.ttls.values()),
+        )
+
+    def _backend(self) -> str | BaseCache:
+        if self.backend == "memory":
+            cache = BaseCache(self.cache_name)
+            cache.responses = LRUStorage(self.max_entries, self.stats)
+            return cache
+        return self.backend
+
+    def session(self) -> StatsCachedSession:
+        """Returns a cached session using this configuration."""
+        return StatsCachedSession(
+            self.cache_name,
+            backend=self._backend(),
+            expire_after=min(self.ttls.values()),
+            stale_while_revalidate=self.stale_while_revalidate,
+            stats=self.stats,
+        )
+
+
+class ResponseCache:
+    """In-memory cache of decoded responses, for clients without a cached session.
+
+    Entries follow the TTLs, stale-while-revalidate window and `max_entries` of a
+    `CacheConfig`, and are counted in its stats.
+    """
+
+    def __init__(self, config: CacheConfig):
+        self.config = config
+        self._entries: dict[str, tuple[datetime.datetime, Any]] = {}
+
+    def get(self, key: str) -> tuple[Any, bool] | None:
+        """Returns the cached value and whether it is stale, or None on a miss."""
+        entry = self._entries.get(key)
+        now = datetime.datetime.now()
+        if entry is not None and not self._servable(now - entry[0]):
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.config.stats.misses += 1
+            metrics.CACHE_REQUESTS.inc(result="miss")
+            return None
+        # Dicts keep insertion order: re-inserting marks the entry as recent
+        self._entries[key] = self._entries.pop(key)
+        self.config.stats.hits += 1
+        metrics.CACHE_REQUESTS.inc(result="hit")
+        return entry[1], now >= entry[0]
+
+    def set(self, key: str, value: Any, ttl: datetime.timedelta) -> None:
+        self._entries.pop(key, None)
+        self._entries[key] = (datetime.datetime.now() + ttl, value)
+        while len(self._entries) > self.config.max_entries:
+            del self._entries[next(iter(self._entries))]
+            self.config.stats.evictions += 1
+
+    def _servable(self, expired_for: datetime.timedelta) -> bool:
+        """Whether an entry expired for `expired_for` (negative if fresh) is served."""
+        stale = self.config.stale_while_revalidate
+        if expired_for < datetime.timedelta(0) or stale is True:
+            return True
+        return bool(stale) and expired_for < stale
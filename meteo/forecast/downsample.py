@@ -0,0 +1,78 @@
+"""Downsampling of series to the number of points a chart can show.
+
+Largest-Triangle-Three-Buckets (Steinarsson, 2013) keeps the points that
+shape the line the most: the first and last points, then in each bucket the
+point forming the largest triangle with the point kept in the previous
+bucket and the average of the next bucket. The minimum and maximum are kept
+as well, so that axes and markers computed from the chart stay the same.
+"""
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, budget: int) -> np.ndarray:
+    """Returns the positions of the `budget` points to keep, in order.
+
+    Args:
+        x (np.ndarray): Increasing x values, such as epoch seconds.
+        y (np.ndarray): Values, NaN allowed.
+        budget (int): Number of points to keep, at least 3.
+
+    Returns:
+        np.ndarray: Positions into `x` and `y`.
+    """
+    n = len(x)
+    if budget >= n or budget < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Buckets of the points between the first and the last, the last point
+    # being a bucket of its own for the average of the final bucket
+    every = (n - 2) / (budget - 2)
+    edges = np.append((np.arange(budget - 1) * every).astype(np.intp) + 1, n)
+
+    # Average of every bucket, computed at once, NaN values left out
+    sizes = np.diff(edges)
+    finite = np.isfinite(y)
+    mean_x = np.add.reduceat(x, edges[:-1]) / sizes
+    counts = np.add.reduceat(finite, edges[:-1])
+    sums_y = np.add.reduceat(np.where(finite, y, 0.0), edges[:-1])
+    mean_y = np.divide(
+        sums_y, counts, out=np.full(len(sums_y), np.nan), where=counts > 0
+    )
+
+    # The choice in a bucket depends on the previous one: a plain loop over
+    # Python floats beats NumPy calls on buckets of a few points
+    xs, ys = x.tolist(), np.where(finite, y, np.nan).tolist()
+    bounds, mean_x, mean_y = edges.tolist(), mean_x.tolist(), mean_y.tolist()
+    kept = [0]
+    a = 0
+    for i in range(budget - 2):
+        next_x, next_y = mean_x[i + 1], mean_y[i + 1]
+        ax, ay = xs[a], ys[a]
+        if next_y != next_y:
+            next_y = ay
+        # Twice the area of the triangle (a, j, next), as an affine function of j
+        cx, cy, c = next_y - ay, ax - next_x, next_x * ay - ax * next_y
+        best, best_area = bounds[i], -1.0
+        for j in range(bounds[i], bounds[i + 1]):
+            area = abs(cx * xs[j] + cy * ys[j] + c)
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        a = best
+    kept.append(n - 1)
+    kept = np.array(kept, dtype=np.intp)
+    return kept
+
+
+def downsample(x: np.ndarray, y: np.ndarray, budget: int) -> np.ndarray:
+    """Returns the positions of at most `budget` + 2 points to keep, in order.
+
+    The points of the largest triangles, plus the minimum and the maximum.
+    """
+    kept = lttb(x, y, budget)
+    if len(kept) == len(x) or np.isnan(y).all():
+        return kept
+    extremes = [np.nanargmin(y), np.nanargmax(y)]
+    return np.union1d(kept, extremes)
@@ -2,15 +2,52 @@ import dataclasses
 import datetime
 import openmeteo_requests
 from enum import Enum
-from typing import Literal
+from typing import Iterable, Literal
 
 import pandas as pd
 import requests_cache
 from retry_requests import retry
 from dash import Dash
+from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
+
+from meteo import defs, metrics
+
+from .cache import CacheConfig, request_key
+from .scheduler import RefreshScheduler
+from .series import DailySeries, HourlySeries
+from .shared import SharedRefresh
+from .singleflight import SingleFlight
+from .snapshot import ForecastSnapshot
+from .store import ForecastStore
 
 
 class Forecast:
+    URL = defs.OPEN_METEO_URL
+    # The order of variables is important to assign them correctly when decoding
+    CURRENT_VARIABLES = [
+        "temperature_2m",
+        "is_day",
+        "apparent_temperature",
+        "surface_pressure",
+        "weather_code",
+        "wind_speed_10m",
+        "wind_direction_10m",
+        "relative_humidity_2m",
+    ]
+    DAILY_VARIABLES = [
+        "temperature_2m_max",
+        "temperature_2m_min",
+        "weather_code",
+        "sunrise",
+        "sunset",
+        "uv_index_max",
+        "uv_index_clear_sky_max",
+        "precipitation_probability_max",
+    ]
+    HOURLY_VARIABLES = ["temperature_2m", "weather_code", "precipitation_probability"]
+    RETRIES = 5
+    BACKOFF_FACTOR = 0.2
+
     class Coordinates(Enum):
         BERLIN = (52.52, 13.41)
         PARIS = (48.85, 2.35)
@@ -18,13 +55,18 @@ class Forecast:
         NEW_YORK = (40.71, -74.01)
         TOKYO = (35.68, 139.76)
 
+    cache_config: CacheConfig = CacheConfig()
     cache_session: requests_cache.CachedSession
     retry_session: requests_cache.CachedSession
     openmeteo: openmeteo_requests.Client
+    single_flight: SingleFlight = SingleFlight()
+    store: ForecastStore | None = None
     _instance = None
 
     @property
     def hourly_dataframe(self) -> pd.DataFrame:
+        if self._hourly_dataframe is None:
+            self._hourly_dataframe = self.fetch_data()
         return self._hourly_dataframe
 
     def __init__(self, app: Dash, coordinates: tuple[float, float]):
@@ -33,14 +75,98 @@ class Forecast:
         self._last_update = datetime.datetime.min
         self.app = app
         self.coordinates = coordinates
+        self.snapshot = ForecastSnapshot(self)
+        self.scheduler = RefreshScheduler(self.snapshot)
+        self.shared: SharedRefresh | None = None
         self._instance = self
 
+    @classmethod
+    def setup_client(cls, cache_config: CacheConfig | None = None) -> None:
+        """Setup the Open-Meteo API client with cache and retry on error."""
+        if cache_config is not None:
+            cls.cache_config = cache_config
+        cls.cache_session = cls.cache_config.session()
+        cls.retry_session = retry(
+            cls.cache_session, retries=cls.RETRIES, backoff_factor=cls.BACKOFF_FACTOR
+        )
+        cls.openmeteo = openmeteo_requests.Client(session=cls.retry_session)
+
+    @classmethod
+    def request(
+        cls, params: dict, tiers: Iterable[str], refresh: bool = False
+    ) -> list[WeatherApiResponse]:
+        """Request the API, caching the response for the TTL of its tiers.
+
+        Concurrent identical requests share a single upstream call, counted in
+        `single_flight.stats`.
+        """
+        return cls.fetch(params, tiers, refresh)[0]
+
+    @classmethod
+    def fetch(
+        cls, params: dict, tiers: Iterable[str], refresh: bool = False
+    ) -> tuple[list[WeatherApiResponse], datetime.datetime]:
+        """Request the API like `request`, also returning when it answered.
+
+        Args:
+            refresh (bool): Whether to skip the cache, for a fresh response
+                rather than a cached or stale one. The response is still cached.
+
+        Returns:
+            tuple: The responses, and when they were fetched upstream.
+        """
+        tiers = tuple(tiers)
+        key = request_key(cls.URL, params)
+        with metrics.FETCH_DURATION.time(tiers=",".join(tiers)):
+            return cls.single_flight.do(
+                # A refresh must not get the cached response of another call
+                f"{key}#refresh" if refresh else key,
+                cls._weather_api,
+                params,
+                tiers,
+                refresh,
+            )
+
+    @classmethod
+    def _weather_api(
+        cls, params: dict, tiers: tuple[str, ...], refresh: bool
+    ) -> tuple[list[WeatherApiResponse], datetime.datetime]:
+        responses = cls.openmeteo.weather_api(
+            cls.URL,
+            params=params,
+            expire_after=cls.cache_config.ttl(tiers),
+            force_refresh=refresh,
+        )
+        # A client set without a cached session fetched the response just now
+        session = getattr(cls, "cache_session", None)
+        if session is None:
+            return responses, datetime.datetime.now()
+        return responses, session.last_created_at()
+
+    def fetch_tiers(
+        self, snapshot: ForecastSnapshot, tiers: Iterable[str], refresh: bool = False
+    ) -> tuple[dict[str, WeatherApiResponse], datetime.datetime]:
+        """Fetches the given tiers of a snapshot, all in a single request.
+
+        Returns:
+            tuple: The response holding each tier, keyed by tier, and when it
+                was fetched upstream.
+        """
+        tiers = tuple(tiers)
+        responses, fetched_at = self.fetch(snapshot.params(tiers), tiers, refresh)
+        return dict.fromkeys(tiers, responses[0]), fetched_at
+
     @classmethod
     def build(
         cls,
         app: Dash,
         date_range: range = range(-2, 8),
         coordinates: Coordinates | tuple[float, float] | None = None,
+        background_refresh: bool = True,
+        cache_config: CacheConfig | None = None,
+        lazy: bool = True,
+        store_dir: str | None = defs.FORECAST_STORE_DIR,
+        shared_refresh: bool = True,
     ) -> "Forecast":
         """Build a Forecast object with data from Open-Meteo API.
 
@@ -48,19 +174,32 @@ class Forecast:
             app (Dash): The Dash app instance.
             date_range (range, optional): Range of days for past and forecast data.
                 Defaults to range(-2, 3), which includes 2 past days and 3 forecast days.
+            background_refresh (bool, optional): Whether to refresh the snapshot
+                from a background thread instead of from the Dash callbacks.
+                Defaults to True.
+            cache_config (CacheConfig, optional): How API responses are cached.
+                Defaults to a SQLite cache with per-tier TTLs.
+            lazy (bool, optional): Whether to return without waiting for the API.
+                Widgets are then laid out with placeholder data until the first
+                background refresh completes. Defaults to True.
+            store_dir (str, optional): Directory of the local store of fetched
+                series, which warm-starts the snapshot. None disables it.
+                Defaults to `defs.FORECAST_STORE_DIR`.
+            shared_refresh (bool, optional): Whether the processes sharing the
+                store elect one of them to refresh the forecast in the
+                background, the others reading it from the store. Defaults to
+                True.
 
         Returns:
             Forecast: An instance of the Forecast class with populated data.
         """
-        # Setup the Open-Meteo API client with cache and retry on error
-        cls.cache_session = requests_cache.CachedSession(".cache", expire_after=3600)
-        cls.retry_session = retry(cls.cache_session, retries=5, backoff_factor=0.2)
-        cls.openmeteo = openmeteo_requests.Client(session=cls.retry_session)
+        cls.setup_client(cache_config)
+        cls.store = ForecastStore(store_dir) if store_dir else None
 
         # Make sure all required weather variables are listed here
         # The order of variables in hourly or daily is important to assign them correctly below
 
-        forecast = Forecast(
+        forecast = cls(
             app,
             (
                 (coordinates if isinstance(coordinates, tuple) else coordinates.value)
@@ -69,11 +208,26 @@ class Forecast:
             ),
         )
         forecast._date_range = date_range
-        forecast._hourly_dataframe = forecast.fetch_data()
+        forecast.snapshot.warm_start()
+        if background_refresh and shared_refresh and cls.store is not None:
+            forecast.shared = SharedRefresh(
+                forecast.snapshot,
+                forecast.scheduler,
+                cls.store.lock_path([forecast.coordinates]),
+            )
+            forecast.shared.elect()
+        if lazy:
+            forecast._hourly_dataframe = None
+        elif forecast.shared is None or forecast.shared.leader:
+            forecast._hourly_dataframe = forecast.fetch_data()
+            forecast.snapshot.get()
+        if forecast.shared is not None:
+            forecast.shared.start()
+        elif background_refresh:
+            forecast.scheduler.start()
         return forecast
 
     def fetch_data(self):
-        url = "https://api.open-meteo.com/v1/forecast"
         params = {
             "latitude": self.coordinates[0],
             "longitude": self.coordinates[1],
@@ -83,7 +237,7 @@ class Forecast:
             "past_days": abs(min(0, self._date_range.start)),
             "forecast_days": self._date_range.stop - 1,
         }
-        responses = self.openmeteo.weather_api(url, params=params)
+        responses = self.request(params, ForecastSnapshot.TIERS)
 
         # Process first location. Add a for-loop for multiple locations or weather models
         response = responses[0]
@@ -110,7 +264,7 @@ class Forecast:
         daily_sunset = daily.Variables(1).ValuesInt64AsNumpy()
         return (hourly_dataframe, daily_sunrise, daily_sunset)
 
-    @dataclasses.dataclass
+    @dataclasses.dataclass(frozen=True, slots=True)
     class CurrentWeather:
         temperature: int = 0
         is_day: int = 0
@@ -122,37 +276,32 @@ class Forecast:
         relative_humidity: int = 0
         unit: Literal["C", "F"] = "C"
 
-    def fetch_current_weather(
-        self, farenheit: bool = False
+    def decode_current(
+        self, response, farenheit: bool = False
     ) -> "Forecast.CurrentWeather":
-        url = "https://api.open-meteo.com/v1/forecast"
-        params = {
-            "latitude": 52.52,
-            "longitude": 13.41,
-            "current": [
-                "temperature_2m",
-                "is_day",
-                "apparent_temperature",
-                "surface_pressure",
-                "weather_code",
-                "wind_speed_10m",
-                "wind_direction_10m",
-                "relative_humidity_2m",
-            ],
-            "temperature_unit": "fahrenheit" if farenheit else "celsius",
-        }
-        responses = self.openmeteo.weather_api(url, params=params)
-        response = responses[0]
         current = response.Current()
         if not current:
             return self.CurrentWeather()
         return self.CurrentWeather(
             *(current.Variables(i).Value() for i in range(current.VariablesLength())),
+            unit="F" if farenheit else "C",
         )
 
-    @dataclasses.dataclass
+    def fetch_current_weather(
+        self, farenheit: bool = False
+    ) -> "Forecast.CurrentWeather":
+        params = {
+            "latitude": self.coordinates[0],
+            "longitude": self.coordinates[1],
+            "current": self.CURRENT_VARIABLES,
+            "temperature_unit": "fahrenheit" if farenheit else "celsius",
+        }
+        responses = self.request(params, ["current"])
+        return self.decode_current(responses[0], farenheit)
+
+    @dataclasses.dataclass(frozen=True, slots=True)
     class DailyWeather:
-        date: datetime.date = datetime.date.today()
+        date: datetime.date = dataclasses.field(default_factory=datetime.date.today)
         temperature_max: float = 0.0
         temperature_min: float = 0.0
         weather_code: int = 0
@@ -163,80 +312,45 @@ class Forecast:
         precipitation_probability: float = 0.0
         unit: Literal["C", "F"] = "C"
 
+    def decode_daily(self, response, farenheit: bool = False) -> DailySeries:
+        return DailySeries.decode(response.Daily(), unit="F" if farenheit else "C")
+
     def fetch_daily_weather(
         self, farenheit: bool = False, past_days: int = 0, forecast_days: int = 1
-    ) -> list["Forecast.DailyWeather"]:
-        url = "https://api.open-meteo.com/v1/forecast"
+    ) -> DailySeries:
         params = {
-            "latitude": 52.52,
-            "longitude": 13.41,
-            "daily": [
-                "temperature_2m_max",
-                "temperature_2m_min",
-                "weather_code",
-                "sunrise",
-                "sunset",
-                "uv_index_max",
-                "uv_index_clear_sky_max",
-                "precipitation_probability_max",
-            ],
+            "latitude": self.coordinates[0],
+            "longitude": self.coordinates[1],
+            "daily": self.DAILY_VARIABLES,
             "past_days": past_days,
             "forecast_days": forecast_days,
             "temperature_unit": "fahrenheit" if farenheit else "celsius",
         }
-        responses = self.openmeteo.weather_api(url, params=params)
-        response = responses[0]
-        daily = response.Daily()
-        if not daily:
-            return self.DailyWeather()
-        start = datetime.datetime.now().date() - datetime.timedelta(days=past_days)
-        return [
-            self.DailyWeather(
-                date=start + datetime.timedelta(days=i),
-                temperature_max=daily.Variables(0).ValuesAsNumpy()[i],
-                temperature_min=daily.Variables(1).ValuesAsNumpy()[i],
-                weather_code=daily.Variables(2).ValuesAsNumpy()[i],
-                sunrise=daily.Variables(3).ValuesInt64AsNumpy()[i],
-                sunset=daily.Variables(4).ValuesInt64AsNumpy()[i],
-                uv_index_max=daily.Variables(5).ValuesAsNumpy()[i],
-                uv_index_clear_sky_max=daily.Variables(6).ValuesAsNumpy()[i],
-                precipitation_probability=daily.Variables(7).ValuesAsNumpy()[i],
-                unit="F" if farenheit else "C",
-            )
-            for i in range(daily.Variables(0).ValuesAsNumpy().shape[0])
-        ]
+        responses = self.request(params, ["daily"])
+        return self.decode_daily(responses[0], farenheit)
 
-    @dataclasses.dataclass
+    @dataclasses.dataclass(frozen=True, slots=True)
     class HourlyWeather:
-        time: datetime.datetime = datetime.datetime.now()
+        time: datetime.datetime = dataclasses.field(
+            default_factory=datetime.datetime.now
+        )
         temperature_2m: float = 0.0
         weather_code: int = 0
         precipitation_probability: float = 0.0
 
+    def decode_hourly(self, response, farenheit: bool = False) -> HourlySeries:
+        return HourlySeries.decode(response.Hourly(), unit="F" if farenheit else "C")
+
     def fetch_hourly_weather(
         self, farenheit: bool = False, past_days: int = 0, forecast_days: int = 1
-    ) -> list["Forecast.HourlyWeather"]:
-        url = "https://api.open-meteo.com/v1/forecast"
+    ) -> HourlySeries:
         params = {
-            "latitude": 52.52,
-            "longitude": 13.41,
-            "hourly": ["temperature_2m", "weather_code", "precipitation_probability"],
+            "latitude": self.coordinates[0],
+            "longitude": self.coordinates[1],
+            "hourly": self.HOURLY_VARIABLES,
             "past_days": past_days,
             "forecast_days": forecast_days,
             "temperature_unit": "fahrenheit" if farenheit else "celsius",
         }
-        responses = self.openmeteo.weather_api(url, params=params)
-        response = responses[0]
-        hourly = response.Hourly()
-        if not hourly:
-            return []
-        start = datetime.datetime.now().replace(
-            minute=0, second=0, microsecond=0
-        ) - datetime.timedelta(hours=past_days * 24)
-        return [
-            self.HourlyWeather(
-                time=start + datetime.timedelta(hours=i),
-                temperature_2m=hourly.Variables(0).ValuesAsNumpy()[i],
-            )
-            for i in range(hourly.Variables(0).ValuesAsNumpy().shape[0])
-        ]
+        responses = self.request(params, ["hourly"])
+        return self.decode_hourly(responses[0], farenheit)
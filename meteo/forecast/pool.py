@@ -0,0 +1,163 @@
+from typing import Iterable, Iterator
+
+from dash import Dash
+
+from meteo import defs
+
+from .async_forecast import AsyncForecast
+from .forecast import Forecast
+from .scheduler import RefreshScheduler
+from .shared import SharedRefresh
+from .snapshot import ForecastSnapshot
+from .store import ForecastStore
+
+
+class ForecastPool:
+    """Forecasts of many locations, refreshed together.
+
+    Open-Meteo accepts lists of latitudes and longitudes and answers with one
+    response per location, in the same order. The pool sends a single batched
+    request for all of its locations and splits the responses into each
+    location's snapshot, so refreshing 50 sites costs one HTTP round-trip.
+
+    With `AsyncForecast` as forecast class, the batches and tiers are fetched
+    concurrently rather than one request after the other.
+
+    A pool can be driven by a `RefreshScheduler` just like a single snapshot.
+    """
+
+    def __init__(
+        self,
+        app: Dash,
+        locations: Iterable[Forecast.Coordinates | tuple[float, float]],
+        batch_size: int = 100,
+        forecast_class: type[Forecast] = Forecast,
+    ):
+        self.app = app
+        self.batch_size = batch_size
+        self.forecast_class = forecast_class
+        self.forecasts: dict[tuple[float, float], Forecast] = {}
+        for location in locations:
+            coordinates = (
+                location.value
+                if isinstance(location, Forecast.Coordinates)
+                else tuple(location)
+            )
+            self.forecasts.setdefault(coordinates, forecast_class(app, coordinates))
+        self.scheduler = RefreshScheduler(self)
+        self.shared: SharedRefresh | None = None
+
+    @classmethod
+    def build(
+        cls,
+        app: Dash,
+        locations: Iterable[Forecast.Coordinates | tuple[float, float]] = (),
+        background_refresh: bool = True,
+        forecast_class: type[Forecast] = Forecast,
+        store_dir: str | None = defs.FORECAST_STORE_DIR,
+        shared_refresh: bool = True,
+    ) -> "ForecastPool":
+        """Build a pool of every known city plus the given custom locations.
+
+        Args:
+            app (Dash): The Dash app instance.
+            locations (Iterable, optional): Extra coordinates to forecast.
+            background_refresh (bool, optional): Whether to refresh the pool
+                from a background thread. Defaults to True.
+            forecast_class (type, optional): `Forecast`, or `AsyncForecast` to
+                fetch batches and tiers concurrently. Defaults to `Forecast`.
+            store_dir (str, optional): Directory of the local store of fetched
+                series, which warm-starts the snapshots. None disables it.
+                Defaults to `defs.FORECAST_STORE_DIR`.
+            shared_refresh (bool, optional): Whether the processes sharing the
+                store elect one of them to refresh the pool in the background,
+                the others reading it from the store. Defaults to True.
+
+        Returns:
+            ForecastPool: A pool with every snapshot populated, from the store
+                only when another process refreshes it.
+        """
+        forecast_class.setup_client()
+        forecast_class.store = ForecastStore(store_dir) if store_dir else None
+        pool = cls(
+            app, [*Forecast.Coordinates, *locations], forecast_class=forecast_class
+        )
+        for forecast in pool:
+            forecast.snapshot.warm_start()
+        store = forecast_class.store
+        if background_refresh and shared_refresh and store is not None:
+            pool.shared = SharedRefresh(
+                pool, pool.scheduler, store.lock_path(pool.forecasts)
+            )
+            pool.shared.elect()
+        if pool.shared is None or pool.shared.leader:
+            pool.refresh()
+        if pool.shared is not None:
+            pool.shared.start()
+        elif background_refresh:
+            pool.scheduler.start()
+        return pool
+
+    def __getitem__(
+        self, location: Forecast.Coordinates | tuple[float, float]
+    ) -> Forecast:
+        if isinstance(location, Forecast.Coordinates):
+            location = location.value
+        return self.forecasts[tuple(location)]
+
+    def __iter__(self) -> Iterator[Forecast]:
+        return iter(self.forecasts.values())
+
+    def __len__(self) -> int:
+        return len(self.forecasts)
+
+    @property
+    def background(self) -> bool:
+        return all(forecast.snapshot.background for forecast in self)
+
+    @background.setter
+    def background(self, value: bool) -> None:
+        for forecast in self:
+            forecast.snapshot.background = value
+
+    def params(self, snapshots: list[ForecastSnapshot], tiers: Iterable[str]) -> dict:
+        """Returns the request parameters fetching the tiers of every snapshot."""
+        return ForecastSnapshot.batch_params(snapshots, tiers)
+
+    def sync(self) -> bool:
+        """Loads what was stored for every location since it was last loaded."""
+        return any([forecast.snapshot.sync() for forecast in self])
+
+    def refresh(self, tiers: Iterable[str] = ForecastSnapshot.TIERS) -> None:
+        """Fetches the given tiers of every location, one request per batch."""
+        snapshots = [forecast.snapshot for forecast in self]
+        if issubclass(self.forecast_class, AsyncForecast):
+            self.forecast_class.refresh_all(snapshots, tiers, self.batch_size)
+            return
+        for start in range(0, len(snapshots), self.batch_size):
+            self._refresh_batch(snapshots[start : start + self.batch_size], tiers)
+
+    def _refresh_batch(
+        self, snapshots: list[ForecastSnapshot], tiers: Iterable[str]
+    ) -> None:
+        tiers = tuple(tiers)
+        tiers = tuple(
+            dict.fromkeys(t for s in snapshots for t in s.tiers_to_fetch(tiers))
+        )
+        try:
+            responses, fetched_at = self.forecast_class.fetch(
+                self.params(snapshots, tiers), tiers, refresh=True
+            )
+            if len(responses) != len(snapshots):
+                raise ValueError(
+                    f"Expected {len(snapshots)} responses, got {len(responses)}"
+                )
+        except Exception as e:
+            for snapshot in snapshots:
+                try:
+                    snapshot.fail(tiers, e)
+                except Exception:
+                    pass
+            return
+        for snapshot, response in zip(snapshots, responses):
+            snapshot.apply(response, tiers, fetched_at)
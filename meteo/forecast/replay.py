@@ -0,0 +1,310 @@
+"""Offline stand-in for the Open-Meteo forecast API.
+
+`ReplayServer` answers the requests `Forecast` sends with recorded flatbuffers
+responses. Requests that were never recorded are answered with synthesized
+data of the right shape, so the app runs without any network. Latency and
+errors can be injected to reproduce a slow or flaky upstream.
+
+Run `python -m meteo.forecast.replay --help`, then start the app with
+`OPEN_METEO_URL=http://127.0.0.1:8070/v1/forecast`.
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import flatbuffers
+import numpy as np
+import requests
+
+from .cache import request_key
+
+PATH = "/v1/forecast"
+UPSTREAM_URL = "https://api.open-meteo.com/v1/forecast"
+
+# Field slots of the openmeteo_sdk tables, which come without a builder
+_RESPONSE_FIELDS = 16
+_RESPONSE_LATITUDE, _RESPONSE_LONGITUDE = 0, 1
+_RESPONSE_CURRENT, _RESPONSE_DAILY, _RESPONSE_HOURLY = 9, 10, 11
+_RESPONSE_MINUTELY_15 = 12
+_SERIES_FIELDS = 4
+_SERIES_TIME, _SERIES_TIME_END, _SERIES_INTERVAL, _SERIES_VARIABLES = 0, 1, 2, 3
+_VARIABLE_FIELDS = 14
+_VARIABLE_VALUE, _VARIABLE_VALUES, _VARIABLE_VALUES_INT64 = 2, 3, 4
+
+_INT64_VARIABLES = ("sunrise", "sunset")
+_WEATHER_CODES = np.array([0, 1, 2, 3, 61, 3, 2, 1])
+
+
+def _synthesize_values(name: str, times: np.ndarray, latitude: float) -> np.ndarray:
+    """Returns plausible values of a variable at the given epoch times."""
+    hours = (times % 86400) / 3600
+    diurnal = np.sin((hours - 9) / 24 * 2 * np.pi)
+    base = 20 - abs(latitude) / 4
+    if name in ("temperature_2m", "apparent_temperature"):
+        return base + 5 * diurnal - (name == "apparent_temperature")
+    if name == "temperature_2m_max":
+        return np.full(len(times), base + 5.0)
+    if name == "temperature_2m_min":
+        return np.full(len(times), base - 5.0)
+    if name == "is_day":
+        return ((hours >= 7) & (hours < 19)).astype(float)
+    if name == "weather_code":
+        return _WEATHER_CODES[(times // 3600) % len(_WEATHER_CODES)].astype(float)
+    if name.startswith("precipitation_probability"):
+        return (times // 3600 * 7) % 80.0
+    if name == "sunrise":
+        return times - times % 86400 + 6 * 3600
+    if name == "sunset":
+        return times - times % 86400 + 18 * 3600
+    if name.startswith("uv_index"):
+        return np.full(len(times), 5.0 if "clear_sky" in name else 4.0)
+    defaults = {
+        "surface_pressure": 1013.0,
+        "wind_speed_10m": 12.0,
+        "wind_direction_10m": 240.0,
+        "relative_humidity_2m": 65.0,
+    }
+    return np.full(len(times), defaults.get(name, 0.0))
+
+
+def _build_series(
+    builder: flatbuffers.Builder,
+    names: list[str],
+    start: int,
+    interval: int,
+    count: int,
+    latitude: float,
+    scalar: bool = False,
+) -> int:
+    times = start + interval * np.arange(count, dtype=np.int64)
+    variables = []
+    for name in names:
+        values = _synthesize_values(name, times, latitude)
+        if scalar:
+            builder.StartObject(_VARIABLE_FIELDS)
+            builder.PrependFloat32Slot(_VARIABLE_VALUE, float(values[0]), 0.0)
+        elif name in _INT64_VARIABLES:
+            vector = builder.CreateNumpyVector(values.astype(np.int64))
+            builder.StartObject(_VARIABLE_FIELDS)
+            builder.PrependUOffsetTRelativeSlot(_VARIABLE_VALUES_INT64, vector, 0)
+        else:
+            vector = builder.CreateNumpyVector(values.astype(np.float32))
+            builder.StartObject(_VARIABLE_FIELDS)
+            builder.PrependUOffsetTRelativeSlot(_VARIABLE_VALUES, vector, 0)
+        variables.append(builder.EndObject())
+
+    builder.StartVector(4, len(variables), 4)
+    for variable in reversed(variables):
+        builder.PrependUOffsetTRelative(variable)
+    vector = builder.EndVector()
+    builder.StartObject(_SERIES_FIELDS)
+    builder.PrependInt64Slot(_SERIES_TIME, start, 0)
+    builder.PrependInt64Slot(_SERIES_TIME_END, start + interval * count, 0)
+    builder.PrependInt32Slot(_SERIES_INTERVAL, interval, 0)
+    builder.PrependUOffsetTRelativeSlot(_SERIES_VARIABLES, vector, 0)
+    return builder.EndObject()
+
+
+def synthesize(
+    latitude: float, longitude: float, params: dict[str, list[str]]
+) -> bytes:
+    """Returns a size-prefixed response message for a single location."""
+    builder = flatbuffers.Builder(1024)
+    now = int(time.time())
+    series = {}
+    if params.get("current"):
+        start = now - now % 900
+        series[_RESPONSE_CURRENT] = _build_series(
+            builder, params["current"], start, 900, 1, latitude, scalar=True
+        )
+    if params.get("hourly"):
+        past_days = int(params.get("past_days", ["0"])[0])
+        forecast_days = int(params.get("forecast_days", ["7"])[0])
+        past = int(params.get("past_hours", [past_days * 24])[0])
+        future = int(params.get("forecast_hours", [forecast_days * 24])[0])
+        start = now - now % 3600 - past * 3600
+        series[_RESPONSE_HOURLY] = _build_series(
+            builder, params["hourly"], start, 3600, past + future, latitude
+        )
+    if params.get("minutely_15"):
+        past_days = int(params.get("past_days", ["0"])[0])
+        forecast_days = int(params.get("forecast_days", ["7"])[0])
+        past = int(params.get("past_minutely_15", [past_days * 96])[0])
+        future = int(params.get("forecast_minutely_15", [forecast_days * 96])[0])
+        start = now - now % 900 - past * 900
+        series[_RESPONSE_MINUTELY_15] = _build_series(
+            builder, params["minutely_15"], start, 900, past + future, latitude
+        )
+    if params.get("daily"):
+        past = int(params.get("past_days", ["0"])[0])
+        future = int(params.get("forecast_days", ["7"])[0])
+        start = now - now % 86400 - past * 86400
+        series[_RESPONSE_DAILY] = _build_series(
+            builder, params["daily"], start, 86400, past + future, latitude
+        )
+
+    builder.StartObject(_RESPONSE_FIELDS)
+    builder.PrependFloat32Slot(_RESPONSE_LATITUDE, latitude, 0.0)
+    builder.PrependFloat32Slot(_RESPONSE_LONGITUDE, longitude, 0.0)
+    for slot, offset in series.items():
+        builder.PrependUOffsetTRelativeSlot(slot, offset, 0)
+    builder.Finish(builder.EndObject())
+    message = bytes(builder.Output())
+    return len(message).to_bytes(4, "little") + message
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """HTTP server replaying recorded Open-Meteo responses.
+
+    Args:
+        address (tuple, optional): Host and port to listen on. Defaults to a
+            free port on localhost.
+        recordings (str, optional): Directory of recorded responses, one file
+            per distinct request. Without it every response is synthesized.
+        record (bool, optional): Whether to fetch requests missing from
+            `recordings` from the real API and save them. Defaults to False.
+        latency (float, optional): Seconds added to every response.
+        jitter (float, optional): Random extra seconds, up to this value.
+        error_rate (float, optional): Share of requests answered with an HTTP
+            500 error, between 0 and 1.
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(
+        self,
+        address: tuple[str, int] = ("127.0.0.1", 0),
+        recordings: str | None = None,
+        record: bool = False,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+    ):
+        super().__init__(address, _ReplayHandler)
+        self.recordings = recordings
+        self.record = record
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{PATH}"
+
+    def start(self) -> "ReplayServer":
+        """Serves requests from a background thread."""
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="replay-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def respond(self, params: dict[str, list[str]]) -> bytes:
+        """Returns the recorded, fetched or synthesized body of a request."""
+        path = self._recording_path(params)
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                return f.read()
+        if path and self.record:
+            response = requests.get(UPSTREAM_URL, params=params, timeout=30)
+            response.raise_for_status()
+            os.makedirs(self.recordings, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(response.content)
+            return response.content
+        return b"".join(
+            synthesize(float(latitude), float(longitude), params)
+            for latitude, longitude in zip(params["latitude"], params["longitude"])
+        )
+
+    def _recording_path(self, params: dict[str, list[str]]) -> str | None:
+        if not self.recordings:
+            return None
+        key = request_key(PATH, params)
+        return os.path.join(
+            self.recordings, f"{hashlib.sha1(key.encode()).hexdigest()}.bin"
+        )
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    server: ReplayServer
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path != PATH:
+            return self._send(404, b'{"error":true,"reason":"Not Found"}')
+
+        server = self.server
+        server.requests += 1
+        time.sleep(server.latency + random.uniform(0, server.jitter))
+        if random.random() < server.error_rate:
+            server.errors += 1
+            return self._send(500, b'{"error":true,"reason":"Injected error"}')
+
+        # Lists arrive either as repeated or comma separated values
+        params = {
+            name: ",".join(values).split(",")
+            for name, values in parse_qs(url.query).items()
+            if name != "format"
+        }
+        params["format"] = ["flatbuffers"]
+        try:
+            body = server.respond(params)
+        except Exception as e:
+            return self._send(502, f'{{"error":true,"reason":"{e}"}}'.encode())
+        self._send(200, body, "application/octet-stream")
+
+    def _send(self, status: int, body: bytes, content_type="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline Open-Meteo stand-in.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8070)
+    parser.add_argument("--recordings", help="directory of recorded responses")
+    parser.add_argument(
+        "--record", action="store_true", help="record missing responses upstream"
+    )
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="0 to 1")
+    args = parser.parse_args()
+
+    server = ReplayServer(
+        (args.host, args.port),
+        recordings=args.recordings,
+        record=args.record,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+    )
+    print(f"Replaying Open-Meteo on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
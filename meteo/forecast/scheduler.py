@@ -0,0 +1,88 @@
+import datetime
+import random
+import threading
+from typing import TYPE_CHECKING
+
+from meteo import defs
+
+if TYPE_CHECKING:
+    from .pool import ForecastPool
+    from .snapshot import ForecastSnapshot
+
+
+class RefreshScheduler:
+    """Background thread refreshing each forecast tier on its own cadence.
+
+    The target is either a single `ForecastSnapshot` or a `ForecastPool`, in
+    which case every location is refreshed in the same batched request.
+
+    Upstream latency is paid by this thread only: Dash callbacks read the
+    latest snapshot from memory, whatever the number of connected clients.
+    Tiers falling due together are fetched in a single request, and each next
+    due time is jittered so several processes do not hit the API in lockstep.
+    """
+
+    DEFAULT_CADENCES = {
+        "current": datetime.timedelta(seconds=defs.CURRENT_REFRESH_INTERVAL_S),
+        "hourly": datetime.timedelta(seconds=defs.HOURLY_REFRESH_INTERVAL_S),
+        "daily": datetime.timedelta(seconds=defs.DAILY_REFRESH_INTERVAL_S),
+    }
+
+    def __init__(
+        self,
+        target: "ForecastSnapshot | ForecastPool",
+        cadences: dict[str, datetime.timedelta] | None = None,
+        jitter: float = defs.REFRESH_JITTER,
+    ):
+        self.target = target
+        self.cadences = {**self.DEFAULT_CADENCES, **(cadences or {})}
+        self.jitter = jitter
+        self._due: dict[str, datetime.datetime] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "RefreshScheduler":
+        """Starts refreshing in the background. Calling it twice is a no-op."""
+        if self.running:
+            return self
+        now = datetime.datetime.now()
+        self._due = {tier: now for tier in self.cadences}
+        self._stop.clear()
+        self.target.background = True
+        self._thread = threading.Thread(
+            target=self._run, name="forecast-refresh", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stops the background thread, letting callbacks fetch inline again."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        self.target.background = False
+
+    def _next_due(self, tier: str, now: datetime.datetime) -> datetime.datetime:
+        cadence = self.cadences[tier]
+        return now + cadence * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            now = datetime.datetime.now()
+            due = [tier for tier, at in self._due.items() if at <= now]
+            if due:
+                try:
+                    self.target.refresh(due)
+                except Exception:
+                    # Nothing was ever fetched: retry on the next cadence
+                    pass
+                now = datetime.datetime.now()
+                for tier in due:
+                    self._due[tier] = self._next_due(tier, now)
+            wait = min(self._due.values()) - datetime.datetime.now()
+            self._stop.wait(max(wait.total_seconds(), 0))
@@ -0,0 +1,214 @@
+import calendar
+import datetime
+from typing import TYPE_CHECKING, Iterator, Literal
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from openmeteo_sdk.VariablesWithTime import VariablesWithTime
+
+    from .forecast import Forecast
+
+
+TimeLike = datetime.datetime | datetime.date | np.datetime64 | int | float
+
+
+def _to_epoch(value: TimeLike) -> int:
+    """Converts a time to UTC epoch seconds.
+
+    Naive datetimes are local times, like the ones from `datetime.now()`, and
+    dates are midnight UTC, like the daily time index of the API.
+    """
+    if isinstance(value, datetime.datetime):
+        return int(value.timestamp())
+    if isinstance(value, datetime.date):
+        return calendar.timegm(value.timetuple())
+    if isinstance(value, np.datetime64):
+        return int(value.astype("datetime64[s]").astype(np.int64))
+    return int(value)
+
+
+class Series:
+    """Forecast variables decoded once into NumPy columns sharing a time index.
+
+    Each variable of the API response is decoded exactly once, and the columns
+    are views on the response buffer. Slicing, by position or by time window,
+    returns another series of views on the same columns without copying.
+    Row objects are only built on demand, for code that still wants them.
+    """
+
+    COLUMNS: tuple[str, ...] = ()
+    INT64_COLUMNS: tuple[str, ...] = ()
+
+    def __init__(
+        self, time: np.ndarray, unit: Literal["C", "F"] = "C", **columns: np.ndarray
+    ):
+        self._time = time
+        self._columns = columns
+        self.unit = unit
+
+    @classmethod
+    def decode(
+        cls, variables: "VariablesWithTime | None", unit: Literal["C", "F"] = "C"
+    ) -> "Series":
+        """Decodes the variables of an API response, requested in COLUMNS order."""
+        if not variables:
+            return cls.empty(unit)
+        interval = variables.Interval()
+        time = np.arange(variables.Time(), variables.TimeEnd(), interval, np.int64)
+        columns = {}
+        for i, name in enumerate(cls.COLUMNS):
+            variable = variables.Variables(i)
+            columns[name] = (
+                variable.ValuesInt64AsNumpy()
+                if name in cls.INT64_COLUMNS
+                else variable.ValuesAsNumpy()
+            )
+        return cls(time, unit, **columns)
+
+    @classmethod
+    def empty(cls, unit: Literal["C", "F"] = "C") -> "Series":
+        return cls(
+            np.empty(0, np.int64),
+            unit,
+            **{
+                name: np.empty(0, np.int64 if name in cls.INT64_COLUMNS else np.float32)
+                for name in cls.COLUMNS
+            },
+        )
+
+    @classmethod
+    def concat(cls, series: list["Series"]) -> "Series":
+        """Returns the rows of every series, one after the other, in new columns."""
+        return cls(
+            np.concatenate([s.epoch for s in series]),
+            series[0].unit,
+            **{
+                name: np.concatenate([s.column(name) for s in series])
+                for name in cls.COLUMNS
+            },
+        )
+
+    @property
+    def epoch(self) -> np.ndarray:
+        """Time index as UTC epoch seconds."""
+        return self._time
+
+    @property
+    def time(self) -> np.ndarray:
+        """Time index as UTC datetime64."""
+        return self._time.astype("datetime64[s]")
+
+    def local_time(self) -> np.ndarray:
+        """Time index as local wall-clock datetime64, like `fromtimestamp`."""
+        if not len(self):
+            return self.time
+        first, last = (
+            datetime.datetime.fromtimestamp(int(t)).astimezone().utcoffset()
+            for t in (self._time[0], self._time[-1])
+        )
+        if first == last:
+            offsets = int(first.total_seconds())
+        else:
+            offsets = np.array(
+                [
+                    datetime.datetime.fromtimestamp(t).astimezone().utcoffset()
+                    // datetime.timedelta(seconds=1)
+                    for t in self._time.tolist()
+                ]
+            )
+        return (self._time + offsets).astype("datetime64[s]")
+
+    def column(self, name: str) -> np.ndarray:
+        return self._columns[name]
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        columns = self.__dict__.get("_columns", {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(f"{type(self).__name__} has no column {name!r}")
+
+    def __len__(self) -> int:
+        return len(self._time)
+
+    def __iter__(self) -> Iterator:
+        return (self.row(i) for i in range(len(self)))
+
+    def __getitem__(self, key: int | slice):
+        if isinstance(key, slice):
+            return type(self)(
+                self._time[key],
+                self.unit,
+                **{name: values[key] for name, values in self._columns.items()},
+            )
+        return self.row(range(len(self))[key])
+
+    def window(
+        self, start: TimeLike | None = None, end: TimeLike | None = None
+    ) -> "Series":
+        """Returns the rows in [start, end), as views on the same columns."""
+        lo, hi = self.bounds(start, end)
+        return self[lo:hi]
+
+    def bounds(
+        self, start: TimeLike | None = None, end: TimeLike | None = None
+    ) -> tuple[int, int]:
+        """Returns the positions of the [start, end) window with a binary search."""
+        lo = 0 if start is None else self._time.searchsorted(_to_epoch(start))
+        hi = len(self) if end is None else self._time.searchsorted(_to_epoch(end))
+        return int(lo), int(max(lo, hi))
+
+    def row(self, i: int):
+        """Returns a row object built from the i-th value of every column."""
+        raise NotImplementedError("Subclasses must implement the row method.")
+
+
+class HourlySeries(Series):
+    COLUMNS = ("temperature_2m", "weather_code", "precipitation_probability")
+
+    def row(self, i: int) -> "Forecast.HourlyWeather":
+        from .forecast import Forecast
+
+        return Forecast.HourlyWeather(
+            time=datetime.datetime.fromtimestamp(int(self._time[i])),
+            temperature_2m=self.temperature_2m[i],
+            weather_code=self.weather_code[i],
+            precipitation_probability=self.precipitation_probability[i],
+        )
+
+
+class DailySeries(Series):
+    COLUMNS = (
+        "temperature_max",
+        "temperature_min",
+        "weather_code",
+        "sunrise",
+        "sunset",
+        "uv_index_max",
+        "uv_index_clear_sky_max",
+        "precipitation_probability",
+    )
+    INT64_COLUMNS = ("sunrise", "sunset")
+
+    @property
+    def dates(self) -> np.ndarray:
+        """Time index as datetime64 dates."""
+        return self.time.astype("datetime64[D]")
+
+    def on(self, date: datetime.date) -> "Forecast.DailyWeather | None":
+        """Returns the row of the given date, if any."""
+        i = self._time.searchsorted(_to_epoch(date))
+        if i < len(self) and self._time[i] == _to_epoch(date):
+            return self.row(i)
+        return None
+
+    def row(self, i: int) -> "Forecast.DailyWeather":
+        from .forecast import Forecast
+
+        return Forecast.DailyWeather(
+            date=datetime.datetime.fromtimestamp(
+                int(self._time[i]), datetime.timezone.utc
+            ).date(),
+            **{name: self._columns[name][i] for name in self.COLUMNS},
+            unit=self.unit,
+        )
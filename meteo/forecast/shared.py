@@ -0,0 +1,127 @@
+import fcntl
+import os
+import threading
+from typing import TYPE_CHECKING
+
+from meteo import defs
+
+if TYPE_CHECKING:
+    from .pool import ForecastPool
+    from .scheduler import RefreshScheduler
+    from .snapshot import ForecastSnapshot
+
+
+class LeaderLock:
+    """Exclusive lock on a file, held by at most one process at a time.
+
+    The operating system releases the lock when its process exits, crashed or
+    not, for another process to take it over.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: int | None = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self) -> bool:
+        """Takes the lock if no other process holds it, without waiting."""
+        if self._fd is not None:
+            return True
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        # For humans looking for the leader
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+
+class SharedRefresh:
+    """Refreshes a forecast target from one process among those sharing a store.
+
+    The process holding the lock is the leader: it runs the target's
+    `RefreshScheduler`, which fetches upstream and writes every result to the
+    `ForecastStore`. The other processes, such as the other gunicorn workers,
+    follow: they never fetch, and load what the leader wrote every
+    `poll_interval`. Upstream calls and cache accesses are then those of a
+    single process, whatever the number of workers.
+
+    When the leader exits, its lock is released and the next follower to poll
+    takes over. The election must happen after workers are forked: a lock
+    taken in a gunicorn master started with `--preload` would be shared by
+    every worker.
+    """
+
+    def __init__(
+        self,
+        target: "ForecastSnapshot | ForecastPool",
+        scheduler: "RefreshScheduler",
+        lock_path: str,
+        poll_interval: float = defs.SHARED_POLL_INTERVAL_S,
+    ):
+        self.target = target
+        self.scheduler = scheduler
+        self.poll_interval = poll_interval
+        self.lock = LeaderLock(lock_path)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def leader(self) -> bool:
+        return self.lock.held
+
+    def elect(self) -> bool:
+        """Tries to become the leader, returning whether this process is."""
+        return self.lock.acquire()
+
+    def start(self) -> "SharedRefresh":
+        """Starts leading or following, in the background."""
+        self.target.background = True
+        self._poll()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="forecast-shared", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stops refreshing, and hands the leadership over if this process had it."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        if self.leader:
+            self.scheduler.stop(timeout)
+            self.lock.release()
+
+    def _poll(self) -> None:
+        if self.scheduler.running:
+            return
+        if self.elect():
+            print(f"Process {os.getpid()} now refreshes the forecast")
+            self.scheduler.start()
+            return
+        self.target.sync()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self._poll()
+            except Exception as e:
+                print(f"Error following the forecast refresh: {e}")
@@ -0,0 +1,79 @@
+import asyncio
+import dataclasses
+import threading
+from typing import Any, Awaitable, Callable
+
+
+class SingleFlight:
+    """Shares one in-flight call between concurrent callers with the same key.
+
+    The first caller of a key runs the call. Callers arriving while it is in
+    flight wait for it and get its result, or its error, instead of running
+    their own. Once it completes, the next caller of the key runs a new call.
+
+    Example:
+        flight = SingleFlight()
+        flight.do(key, fetch, params)  # from any number of threads at once
+    """
+
+    @dataclasses.dataclass
+    class Stats:
+        calls: int = 0
+        coalesced: int = 0
+
+    class _Call:
+        __slots__ = ("done", "result", "error")
+
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error: BaseException | None = None
+
+    def __init__(self):
+        self.stats = SingleFlight.Stats()
+        self._lock = threading.Lock()
+        self._calls: dict[str, SingleFlight._Call] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def do(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Returns `fn(*args, **kwargs)`, sharing the call in flight for `key`."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = SingleFlight._Call()
+                self.stats.calls += 1
+            else:
+                self.stats.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def ado(self, key: str, fn: Callable[..., Awaitable], *args, **kwargs) -> Any:
+        """Awaits `fn(*args, **kwargs)`, sharing the call in flight for `key`.
+
+        Must always be awaited from the same event loop.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(fn(*args, **kwargs))
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+            self.stats.calls += 1
+        else:
+            self.stats.coalesced += 1
+        # A cancelled caller must not cancel the call the others are waiting for
+        return await asyncio.shield(task)
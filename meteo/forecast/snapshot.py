@@ -0,0 +1,434 @@
+import dataclasses
+import datetime
+import threading
+from typing import TYPE_CHECKING, Iterable
+
+from meteo import metrics
+
+from .series import DailySeries, HourlySeries, TimeLike, _to_epoch
+
+if TYPE_CHECKING:
+    from .forecast import Forecast
+
+
+HOUR_S = 60 * 60
+
+
+def _current_hour() -> int:
+    """Returns the start of the current hour, in UTC epoch seconds."""
+    now = int(datetime.datetime.now().timestamp())
+    return now - now % HOUR_S
+
+
+class ForecastSnapshot:
+    """Latest decoded forecast of a single location, shared by every widget.
+
+    The union of the current, hourly and daily variables is fetched in one
+    request per refresh window. Every widget callback, in every browser tab,
+    then reads from that single decoded response.
+
+    When a background `RefreshScheduler` is attached, `get` never touches the
+    network: each tier is refreshed on its own cadence and callbacks only read
+    the latest in-memory result.
+    """
+
+    TIERS = ("current", "hourly", "daily")
+
+    @dataclasses.dataclass
+    class Data:
+        current: "Forecast.CurrentWeather"
+        hourly: HourlySeries
+        daily: DailySeries
+        fetched_at: dict[str, datetime.datetime]
+        errors: dict[str, str] = dataclasses.field(default_factory=dict)
+
+        @classmethod
+        def empty(cls) -> "ForecastSnapshot.Data":
+            """Returns placeholder data, served until the first fetch completes."""
+            from .forecast import Forecast
+
+            return cls(
+                current=Forecast.CurrentWeather(),
+                hourly=HourlySeries.empty(),
+                daily=DailySeries.empty(),
+                fetched_at={},
+            )
+
+        @property
+        def loaded(self) -> bool:
+            """Whether any tier was ever fetched, as opposed to placeholder data."""
+            return bool(self.fetched_at)
+
+        @property
+        def stale(self) -> bool:
+            """Whether the last refresh of any tier failed."""
+            return bool(self.errors)
+
+        def version(self, tier: str) -> float | None:
+            """Returns a version of the given tier, which changes on every fetch.
+
+            The fetch time is used, so that versions from the different
+            processes serving a client do not collide.
+            """
+            fetched_at = self.fetched_at.get(tier)
+            return fetched_at.timestamp() if fetched_at else None
+
+        def age(self, tier: str = "current") -> datetime.timedelta:
+            """Returns how long ago the given tier was successfully fetched."""
+            return datetime.datetime.now() - self.fetched_at[tier]
+
+        def today(self) -> "Forecast.DailyWeather":
+            """Returns the daily forecast of the current day."""
+            from .forecast import Forecast
+
+            today = self.daily.on(datetime.date.today())
+            if today is not None:
+                return today
+            return self.daily[0] if len(self.daily) else Forecast.DailyWeather()
+
+        def upcoming_days(self, count: int) -> DailySeries:
+            """Returns the daily forecasts of the `count` days following today."""
+            tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+            return self.daily.window(start=tomorrow)[:count]
+
+    @dataclasses.dataclass
+    class Stats:
+        hits: int = 0
+        misses: int = 0
+        refreshes: int = 0
+        failures: int = 0
+
+    def __init__(
+        self,
+        forecast: "Forecast",
+        refresh_window: datetime.timedelta = datetime.timedelta(minutes=1),
+        past_hours: int = 24,
+        forecast_hours: int = 24,
+        forecast_days: int = 8,
+    ):
+        self.forecast = forecast
+        self.refresh_window = refresh_window
+        self.past_hours = past_hours
+        self.forecast_hours = forecast_hours
+        self.forecast_days = forecast_days
+        self.background = False
+        self.stats = ForecastSnapshot.Stats()
+        self._data: ForecastSnapshot.Data | None = None
+        self._lock = threading.Lock()
+        # Serializes the writes to the store, which readers never wait for
+        self._save_lock = threading.Lock()
+
+    def params(self, tiers: Iterable[str] = TIERS) -> dict:
+        """Returns the request parameters fetching the given tiers at once."""
+        forecast = self.forecast
+        tiers = set(tiers)
+        params = {
+            "latitude": forecast.coordinates[0],
+            "longitude": forecast.coordinates[1],
+        }
+        if "current" in tiers:
+            params["current"] = forecast.CURRENT_VARIABLES
+        if "hourly" in tiers:
+            params["hourly"] = forecast.HOURLY_VARIABLES
+            past_hours = self.missing_past_hours()
+            if past_hours:
+                params["past_hours"] = past_hours
+            params["forecast_hours"] = self.forecast_hours
+        if "daily" in tiers:
+            params["daily"] = forecast.DAILY_VARIABLES
+            params["forecast_days"] = self.forecast_days
+        return params
+
+    @staticmethod
+    def batch_params(snapshots: list["ForecastSnapshot"], tiers: Iterable[str]) -> dict:
+        """Returns the request parameters fetching the tiers of every snapshot.
+
+        Past hours are requested for the snapshot missing the most of them.
+        """
+        tiers = tuple(tiers)
+        params = snapshots[0].params(tiers)
+        params["latitude"] = [s.forecast.coordinates[0] for s in snapshots]
+        params["longitude"] = [s.forecast.coordinates[1] for s in snapshots]
+        if "hourly" in tiers:
+            past_hours = max(s.missing_past_hours() for s in snapshots)
+            params.pop("past_hours", None)
+            if past_hours:
+                params["past_hours"] = past_hours
+        return params
+
+    def missing_past_hours(self) -> int:
+        """Returns how many past hours the next hourly fetch must request.
+
+        Past hours are final: once held, only the current hour and the
+        following ones are fetched again, and merged after the held ones.
+        """
+        hourly = self._data.hourly if self._data else None
+        hour = _current_hour()
+        start = hour - self.past_hours * HOUR_S
+        if hourly is None or not len(hourly) or hourly.epoch[0] > start:
+            return self.past_hours
+        held = hourly.epoch[hourly.epoch < hour]
+        # Never more than the snapshot keeps, however long refreshes stopped
+        missing = int((hour - held[-1]) // HOUR_S) - 1
+        return min(self.past_hours, max(0, missing))
+
+    def get(self) -> "ForecastSnapshot.Data":
+        """Returns the current snapshot.
+
+        Without a background scheduler the snapshot is fetched when its refresh
+        window expired. Concurrent callers wait for the same fetch instead of
+        issuing their own request, so N clients cost one upstream request per
+        refresh window. With a scheduler, placeholder data is returned until
+        its first refresh completes.
+        """
+        with self._lock:
+            data = self._data
+            if data and (self.background or not self._expired(data)):
+                self.stats.hits += 1
+                return data
+            if self.background:
+                return ForecastSnapshot.Data.empty()
+            self.stats.misses += 1
+            responses, fetched_at = self._request(self.TIERS)
+            self._data = data = self._decode(responses, data, fetched_at)
+        self._save(data, self.TIERS)
+        return data
+
+    def peek(self) -> "ForecastSnapshot.Data":
+        """Returns the latest data, or placeholder data, without ever fetching."""
+        return self._data or ForecastSnapshot.Data.empty()
+
+    def warm_start(self) -> bool:
+        """Loads the forecast last stored for the location, before any fetch.
+
+        Until the first fetch completes, widgets are then laid out and updated
+        with the last known forecast, and its age, instead of placeholder data.
+
+        Returns:
+            bool: Whether any stored tier was loaded.
+        """
+        if self._data is not None:
+            return False
+        return self.sync()
+
+    def sync(self) -> bool:
+        """Loads the tiers stored since this snapshot last fetched or loaded them.
+
+        Processes following a `SharedRefresh` leader call it instead of
+        fetching: the leader writes every fetch to the store.
+
+        Returns:
+            bool: Whether any stored tier was loaded.
+        """
+        store = self.forecast.store
+        if store is None:
+            return False
+        location = self.forecast.coordinates
+        data = self._data
+        loaded = {}
+        for tier in self.TIERS:
+            # The leader's own fetch time, for the same data to have the same
+            # version in every process
+            fetched_at = store.fetched_at(location, tier)
+            if fetched_at is None:
+                continue
+            if data is not None and tier in data.fetched_at:
+                if data.fetched_at[tier] >= fetched_at:
+                    continue
+            value = self._read_stored(tier)
+            if value is not None:
+                loaded[tier] = (value, fetched_at)
+        if not loaded:
+            return False
+        with self._lock:
+            previous = self._data or ForecastSnapshot.Data.empty()
+            self._data = dataclasses.replace(
+                previous,
+                **{tier: value for tier, (value, _) in loaded.items()},
+                fetched_at={
+                    **previous.fetched_at,
+                    **{tier: at for tier, (_, at) in loaded.items()},
+                },
+                errors={k: v for k, v in previous.errors.items() if k not in loaded},
+            )
+        return True
+
+    def _read_stored(self, tier: str):
+        store = self.forecast.store
+        location = self.forecast.coordinates
+        if tier == "current":
+            return store.read_current(location)
+        now = datetime.datetime.now()
+        today = datetime.date.today()
+        if tier == "hourly":
+            start = now - datetime.timedelta(hours=self.past_hours + 1)
+            end = now + datetime.timedelta(hours=self.forecast_hours)
+        else:
+            start, end = today, today + datetime.timedelta(days=self.forecast_days)
+        series = store.read(location, tier, start, end)
+        return series if len(series) else None
+
+    def hourly_window(
+        self, start: TimeLike, end: TimeLike | None = None
+    ) -> HourlySeries:
+        """Returns the hourly rows in [start, end), older ones from the store.
+
+        The snapshot only holds the last `past_hours`: rows before them come
+        from the local store of previous fetches, when there is one.
+        """
+        hourly = self.get().hourly
+        store = self.forecast.store
+        if store is None or (len(hourly) and hourly.epoch[0] <= _to_epoch(start)):
+            return hourly.window(start, end)
+        # The in-memory rows are the latest forecast of their hours
+        older_end = hourly.epoch[0] if len(hourly) else end
+        if len(hourly) and end is not None:
+            older_end = min(older_end, _to_epoch(end))
+        older = store.read(self.forecast.coordinates, "hourly", start, older_end)
+        if not len(older):
+            return hourly.window(start, end)
+        return HourlySeries.concat([older, hourly.window(start, end)])
+
+    def tiers_to_fetch(self, tiers: Iterable[str]) -> tuple[str, ...]:
+        """Returns the tiers a refresh of `tiers` must fetch.
+
+        An empty snapshot has nothing to merge into, so it needs every tier.
+        """
+        return tuple(tiers) if self._data else self.TIERS
+
+    def refresh(self, tiers: Iterable[str] = TIERS) -> "ForecastSnapshot.Data":
+        """Fetches the given tiers and merges them into the snapshot.
+
+        On failure the previous values are kept and the error is recorded on
+        the snapshot, so callers keep serving stale data with its age.
+        """
+        tiers = self.tiers_to_fetch(tiers)
+        try:
+            # Never a cached response: the refresh is due because it is old
+            responses, fetched_at = self._request(tiers, refresh=True)
+        except Exception as e:
+            return self.fail(tiers, e)
+        return self.merge(responses, fetched_at)
+
+    def apply(
+        self,
+        response,
+        tiers: Iterable[str],
+        fetched_at: datetime.datetime | None = None,
+    ) -> "ForecastSnapshot.Data":
+        """Merges the given tiers of a decoded API response into the snapshot."""
+        return self.merge(dict.fromkeys(tiers, response), fetched_at)
+
+    def merge(
+        self, responses: dict, fetched_at: datetime.datetime | None = None
+    ) -> "ForecastSnapshot.Data":
+        """Merges decoded API responses, keyed by the tier they hold, into the snapshot.
+
+        Args:
+            responses (dict): The response holding each tier, keyed by tier.
+            fetched_at (datetime.datetime, optional): When the responses were
+                fetched upstream, now by default.
+        """
+        self.stats.refreshes += 1
+        with self._lock:
+            self._data = data = self._decode(responses, self._data, fetched_at)
+        # Written once the lock is released, so callbacks never wait on the disk
+        self._save(data, responses)
+        return data
+
+    def fail(self, tiers: Iterable[str], error: Exception) -> "ForecastSnapshot.Data":
+        """Records a failed refresh, keeping the previous values of the tiers.
+
+        Raises the error again when there is no previous value to fall back to.
+        """
+        tiers = tuple(tiers)
+        print(f"Error refreshing {', '.join(tiers)} forecast: {error}")
+        self.stats.refreshes += 1
+        self.stats.failures += 1
+        with self._lock:
+            if self._data is None:
+                raise error
+            errors = {**self._data.errors, **{tier: str(error) for tier in tiers}}
+            self._data = dataclasses.replace(self._data, errors=errors)
+            return self._data
+
+    def _expired(self, data: "ForecastSnapshot.Data") -> bool:
+        # Tiers never fetched, such as the current weather after a warm start
+        if len(data.fetched_at) < len(self.TIERS):
+            return True
+        oldest = min(data.fetched_at.values())
+        return datetime.datetime.now() - oldest >= self.refresh_window
+
+    def _request(
+        self, tiers: Iterable[str], refresh: bool = False
+    ) -> tuple[dict, datetime.datetime]:
+        return self.forecast.fetch_tiers(self, tiers, refresh)
+
+    def _merge_hourly(self, held: HourlySeries, fetched: HourlySeries) -> HourlySeries:
+        """Returns the held past hours followed by the fetched ones.
+
+        A new series is built rather than writing into the held one, which
+        callbacks may be reading concurrently.
+        """
+        if not len(fetched):
+            return held
+        start = _current_hour() - self.past_hours * HOUR_S
+        lo = held.bounds(start, int(fetched.epoch[0]))
+        if lo[0] == lo[1]:
+            return fetched
+        return HourlySeries.concat([held[lo[0] : lo[1]], fetched])
+
+    def _save(self, data: "ForecastSnapshot.Data", tiers: Iterable[str]) -> None:
+        """Adds the given tiers of `data` to the local store, when there is one."""
+        store = self.forecast.store
+        if store is None:
+            return
+        with self._save_lock:
+            for tier in tiers:
+                try:
+                    fetched_at = data.fetched_at.get(tier)
+                    if tier == "current":
+                        store.write_current(
+                            self.forecast.coordinates, data.current, fetched_at
+                        )
+                    else:
+                        store.write(
+                            self.forecast.coordinates,
+                            tier,
+                            getattr(data, tier),
+                            fetched_at,
+                        )
+                except OSError as e:
+                    print(f"Error storing {tier} forecast: {e}")
+
+    def _decode(
+        self,
+        responses: dict,
+        previous: "ForecastSnapshot.Data | None",
+        fetched_at: datetime.datetime | None = None,
+    ) -> "ForecastSnapshot.Data":
+        forecast = self.forecast
+        now = fetched_at or datetime.datetime.now()
+        tiers = tuple(responses)
+        decoders = {
+            "current": forecast.decode_current,
+            "hourly": forecast.decode_hourly,
+            "daily": forecast.decode_daily,
+        }
+        decoded = {}
+        for tier, response in responses.items():
+            with metrics.DECODE_DURATION.time(tier=tier):
+                decoded[tier] = decoders[tier](response)
+        if previous is not None and "hourly" in decoded:
+            decoded["hourly"] = self._merge_hourly(previous.hourly, decoded["hourly"])
+        if previous is None:
+            return ForecastSnapshot.Data(
+                **decoded, fetched_at={tier: now for tier in tiers}
+            )
+        errors = {k: v for k, v in previous.errors.items() if k not in tiers}
+        return dataclasses.replace(
+            previous,
+            **decoded,
+            fetched_at={**previous.fetched_at, **{tier: now for tier in tiers}},
+            errors=errors,
+        )
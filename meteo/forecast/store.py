@@ -0,0 +1,221 @@
+import dataclasses
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+from typing import TYPE_CHECKING, Iterable
+
+import numpy as np
+
+from meteo import defs
+
+from .series import DailySeries, HourlySeries, Series, TimeLike, _to_epoch
+
+if TYPE_CHECKING:
+    from .forecast import Forecast
+
+DAY_S = 24 * 60 * 60
+
+
+class ForecastStore:
+    """Local store of the decoded forecasts of every location.
+
+    Hourly and daily rows are partitioned by location, tier and UTC day, one
+    `.npy` file of a structured array per partition:
+
+        <root>/<latitude>_<longitude>/<tier>-<unit>/<YYYY-MM-DD>.npy
+
+    Writes only ever add rows, or replace the rows of the same times with a
+    later forecast, and swap the partition file atomically. Reads memory-map
+    the files, so the processes serving the app share the same pages, and a
+    reader keeps its pages even while a writer swaps the file.
+
+    The current weather is a single record, replaced on every write:
+
+        <root>/<latitude>_<longitude>/current-<unit>.npy
+
+    Every write also records when its tier was fetched upstream, for all
+    processes to give the same version to the same data:
+
+        <root>/<latitude>_<longitude>/<tier>-<unit>.json
+    """
+
+    SERIES: dict[str, type[Series]] = {"hourly": HourlySeries, "daily": DailySeries}
+
+    def __init__(self, root: str = defs.FORECAST_STORE_DIR):
+        self.root = root
+
+    def _directory(self, location: tuple[float, float], tier: str, unit: str) -> str:
+        latitude, longitude = location
+        return os.path.join(
+            self.root, f"{latitude:.4f}_{longitude:.4f}", f"{tier}-{unit}"
+        )
+
+    def lock_path(self, locations: Iterable[tuple[float, float]]) -> str:
+        """Returns the path of the lock electing who refreshes `locations`."""
+        key = ";".join(f"{lat:.4f}_{lon:.4f}" for lat, lon in sorted(locations))
+        digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+        return os.path.join(self.root, "locks", f"{digest}.lock")
+
+    @classmethod
+    def _dtype(cls, tier: str) -> np.dtype:
+        series_class = cls.SERIES[tier]
+        return np.dtype(
+            [("time", np.int64)]
+            + [
+                (name, np.int64 if name in series_class.INT64_COLUMNS else np.float32)
+                for name in series_class.COLUMNS
+            ]
+        )
+
+    def write(
+        self,
+        location: tuple[float, float],
+        tier: str,
+        series: Series,
+        fetched_at: datetime.datetime | None = None,
+    ) -> None:
+        """Adds the rows of `series`, replacing the stored rows of the same times.
+
+        Args:
+            fetched_at (datetime.datetime, optional): When `series` was fetched
+                upstream, now by default.
+        """
+        if not len(series):
+            return
+        rows = np.empty(len(series), self._dtype(tier))
+        rows["time"] = series.epoch
+        for name in self.SERIES[tier].COLUMNS:
+            rows[name] = series.column(name)
+
+        directory = self._directory(location, tier, series.unit)
+        os.makedirs(directory, exist_ok=True)
+        days = rows["time"] // DAY_S
+        for day in np.unique(days):
+            self._write_partition(directory, int(day), rows[days == day])
+        # Last, so that the rows are there once their fetch time is
+        self._write_fetched_at(location, tier, series.unit, fetched_at)
+
+    def write_current(
+        self,
+        location: tuple[float, float],
+        current: "Forecast.CurrentWeather",
+        fetched_at: datetime.datetime | None = None,
+    ) -> None:
+        """Replaces the stored current weather of the location."""
+        values = dataclasses.asdict(current)
+        unit = values.pop("unit")
+        record = np.array(
+            [tuple(values.values())], dtype=[(name, np.float64) for name in values]
+        )
+        path = f"{self._directory(location, 'current', unit)}.npy"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _save_atomically(path, record)
+        self._write_fetched_at(location, "current", unit, fetched_at)
+
+    def _write_fetched_at(
+        self,
+        location: tuple[float, float],
+        tier: str,
+        unit: str,
+        fetched_at: datetime.datetime | None,
+    ) -> None:
+        fetched_at = fetched_at or datetime.datetime.now()
+        # ISO format, read back as the very same datetime, and so version
+        path = f"{self._directory(location, tier, unit)}.json"
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"fetched_at": fetched_at.isoformat()}, f)
+        os.replace(tmp_path, path)
+
+    def read_current(
+        self, location: tuple[float, float], unit: str = "C"
+    ) -> "Forecast.CurrentWeather | None":
+        """Returns the stored current weather of the location, if any."""
+        from .forecast import Forecast
+
+        path = f"{self._directory(location, 'current', unit)}.npy"
+        if not os.path.exists(path):
+            return None
+        record = np.load(path)[0]
+        return Forecast.CurrentWeather(
+            **{name: record[name].item() for name in record.dtype.names}, unit=unit
+        )
+
+    def _write_partition(self, directory: str, day: int, rows: np.ndarray) -> None:
+        path = os.path.join(directory, f"{_day_name(day)}.npy")
+        if os.path.exists(path):
+            previous = np.load(path)
+            merged = np.concatenate([rows, previous])
+            # First occurrence of each time, so the new rows win
+            _, first = np.unique(merged["time"], return_index=True)
+            merged = merged[first]
+            # Compared as bytes, for NaN values to compare equal
+            if merged.tobytes() == previous.tobytes():
+                return
+            rows = merged
+        _save_atomically(path, rows)
+
+    def read(
+        self,
+        location: tuple[float, float],
+        tier: str,
+        start: TimeLike | None = None,
+        end: TimeLike | None = None,
+        unit: str = "C",
+    ) -> Series:
+        """Returns the stored rows of a tier in [start, end).
+
+        A range within one partition is made of views on the memory-mapped
+        file, a range over several partitions is copied into new columns.
+        """
+        series_class = self.SERIES[tier]
+        directory = self._directory(location, tier, unit)
+        if not os.path.isdir(directory):
+            return series_class.empty(unit)
+        first = None if start is None else _day_name(_to_epoch(start) // DAY_S)
+        last = None if end is None else _day_name(_to_epoch(end) // DAY_S)
+        partitions = [
+            np.load(os.path.join(directory, name), mmap_mode="r")
+            for name in sorted(os.listdir(directory))
+            if name.endswith(".npy")
+            and (first is None or name >= f"{first}.npy")
+            and (last is None or name <= f"{last}.npy")
+        ]
+        if not partitions:
+            return series_class.empty(unit)
+        rows = partitions[0] if len(partitions) == 1 else np.concatenate(partitions)
+        series = series_class(
+            rows["time"],
+            unit,
+            **{name: rows[name] for name in series_class.COLUMNS},
+        )
+        return series.window(start, end)
+
+    def fetched_at(
+        self, location: tuple[float, float], tier: str, unit: str = "C"
+    ) -> datetime.datetime | None:
+        """Returns when the stored rows of the tier were fetched, if ever stored.
+
+        Rows without a fetch time, such as rows still being written by their
+        first fetch, are not deemed stored.
+        """
+        path = f"{self._directory(location, tier, unit)}.json"
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return datetime.datetime.fromisoformat(json.load(f)["fetched_at"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+def _save_atomically(path: str, array: np.ndarray) -> None:
+    """Writes `array` next to `path`, then swaps it in, never half-written."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _day_name(day: int) -> str:
+    return (datetime.date(1970, 1, 1) + datetime.timedelta(days=day)).isoformat()
@@ -0,0 +1,253 @@
+"""Prometheus-style metrics of the app, served on `/metrics`.
+
+Each observation is a bisect and a few additions under a lock, cheap enough
+to stay on in production. Metrics are kept per process.
+
+Usage:
+    metrics.init_app(server)
+    widget.setup_callbacks(metrics.instrument(app))
+"""
+
+import bisect
+import contextlib
+import functools
+import threading
+import time
+from typing import Callable, Iterable, Iterator
+
+from dash import Dash
+from flask import Flask, Response, g, has_request_context, request
+
+DURATION_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+BYTES_BUCKETS = tuple(2**power for power in range(6, 23, 2))  # 64 B to 4 MiB
+
+
+class _Metric:
+    TYPE = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], list] = {}
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def _format_labels(self, key: tuple[str, ...], **extra: str) -> str:
+        pairs = [*zip(self.labels, key), *extra.items()]
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.TYPE}"
+        with self._lock:
+            values = {key: list(value) for key, value in self._values.items()}
+        for key, value in sorted(values.items()):
+            yield from self._render_value(key, value)
+
+    def _render_value(self, key: tuple[str, ...], value: list) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    TYPE = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            value = self._values.setdefault(key, [0.0])
+            value[0] += amount
+
+    def _render_value(self, key: tuple[str, ...], value: list) -> Iterator[str]:
+        yield f"{self.name}{self._format_labels(key)} {value[0]}"
+
+
+class Histogram(_Metric):
+    TYPE = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Iterable[str] = (),
+        buckets: tuple[float, ...] = DURATION_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # One count per bucket, then +Inf, then the sum
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    @contextlib.contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observes the duration of the `with` block, in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_value(self, key: tuple[str, ...], value: list) -> Iterator[str]:
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), value[:-1]):
+            cumulative += count
+            labels = self._format_labels(key, le=str(bound))
+            yield f"{self.name}_bucket{labels} {cumulative}"
+        yield f"{self.name}_sum{self._format_labels(key)} {value[-1]}"
+        yield f"{self.name}_count{self._format_labels(key)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text exposition format."""
+        return "\n".join(line for m in self.metrics for line in m.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+CALLBACK_DURATION = REGISTRY.register(
+    Histogram(
+        "meteo_callback_duration_seconds",
+        "Time spent in the body of Dash callbacks.",
+        ["callback"],
+    )
+)
+CALLBACK_RESPONSE_BYTES = REGISTRY.register(
+    Histogram(
+        "meteo_callback_response_bytes",
+        "Size of Dash callback responses, as sent.",
+        ["callback"],
+        BYTES_BUCKETS,
+    )
+)
+HTTP_REQUEST_DURATION = REGISTRY.register(
+    Histogram(
+        "meteo_http_request_duration_seconds",
+        "Time to answer HTTP requests, serialization included.",
+        ["route", "callback"],
+    )
+)
+FETCH_DURATION = REGISTRY.register(
+    Histogram(
+        "meteo_forecast_fetch_duration_seconds",
+        "Time to get Open-Meteo responses, from the cache or upstream.",
+        ["tiers"],
+    )
+)
+UPSTREAM_RESPONSE_BYTES = REGISTRY.register(
+    Histogram(
+        "meteo_upstream_response_bytes",
+        "Size of Open-Meteo responses.",
+        ["cache"],
+        BYTES_BUCKETS,
+    )
+)
+CACHE_REQUESTS = REGISTRY.register(
+    Counter(
+        "meteo_cache_requests_total",
+        "Open-Meteo requests answered from the cache (hit) or upstream (miss).",
+        ["result"],
+    )
+)
+DECODE_DURATION = REGISTRY.register(
+    Histogram(
+        "meteo_decode_duration_seconds",
+        "Time to decode a forecast tier from its flatbuffers response.",
+        ["tier"],
+    )
+)
+
+
+def timed_callback(fn: Callable) -> Callable:
+    """Wraps a Dash callback to observe its duration and response size."""
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if has_request_context():
+            g.callback_name = name
+        with CALLBACK_DURATION.time(callback=name):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+class InstrumentedApp:
+    """Dash app whose callbacks, registered through it, are timed."""
+
+    def __init__(self, app: Dash):
+        self._app = app
+
+    def __getattr__(self, name: str):
+        return getattr(self._app, name)
+
+    def callback(self, *args, **kwargs) -> Callable:
+        register = self._app.callback(*args, **kwargs)
+        return lambda fn: register(timed_callback(fn))
+
+
+def instrument(app: Dash) -> InstrumentedApp:
+    return InstrumentedApp(app)
+
+
+def _start_timer() -> None:
+    g.metrics_start = time.perf_counter()
+
+
+def _observe_response(response: Response) -> Response:
+    start = g.pop("metrics_start", None)
+    if start is None:
+        return response
+    callback = g.pop("callback_name", "")
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    HTTP_REQUEST_DURATION.observe(
+        time.perf_counter() - start, route=route, callback=callback
+    )
+    if callback and response.content_length is not None:
+        CALLBACK_RESPONSE_BYTES.observe(response.content_length, callback=callback)
+    return response
+
+
+def _metrics_view() -> Response:
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+
+def init_app(server: Flask) -> None:
+    """Serves the metrics on `/metrics` and times every request of `server`."""
+    server.before_request(_start_timer)
+    server.after_request(_observe_response)
+    server.add_url_rule("/metrics", "metrics", _metrics_view)
@@ -0,0 +1,162 @@
+"""Opt-in sampling profiler for Dash callback requests.
+
+Once armed, the next callback requests are sampled by a background thread
+reading the stack of the thread serving them. Samples are written as
+collapsed stacks (`frame;frame;frame count`), the input of flamegraph.pl and
+speedscope.
+
+Profiling is disabled unless `METEO_PROFILE_TOKEN` is set. With it:
+    POST /_profile?count=20     arms the profiler for the next 20 callbacks
+    GET /_profile               returns the last collapsed-stack file
+    X-Profile: <token> header   profiles that single request
+Both routes expect an `Authorization: Bearer <token>` header.
+
+When not armed, the cost per request is a flag check and a header lookup.
+"""
+
+import collections
+import datetime
+import hmac
+import os
+import sys
+import threading
+
+from flask import Flask, Response, abort, g, jsonify, request
+
+from meteo import defs
+
+CALLBACK_PATH = "/_dash-update-component"
+
+
+class StackSampler:
+    """Samples the stack of one thread at a fixed interval, in the background."""
+
+    def __init__(self, thread_id: int, interval: float = defs.PROFILE_INTERVAL_S):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: collections.Counter[str] = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> collections.Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self._collapse(frame)] += 1
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            filename = os.path.basename(code.co_filename)
+            frames.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(frames))
+
+
+class Profiler:
+    """Profiles the next callback requests of a Flask server and saves them."""
+
+    def __init__(self, token: str | None, output_dir: str = defs.PROFILES_DIR):
+        self.token = token
+        self.output_dir = output_dir
+        self.remaining = 0
+        self.in_flight = 0
+        self.last_path: str | None = None
+        self._stacks: collections.Counter[str] = collections.Counter()
+        self._lock = threading.Lock()
+
+    def arm(self, count: int) -> None:
+        with self._lock:
+            self.remaining = count
+            self._stacks.clear()
+
+    def authorized(self, token: str | None) -> bool:
+        return bool(self.token and token) and hmac.compare_digest(token, self.token)
+
+    def before_request(self) -> None:
+        if request.path != CALLBACK_PATH:
+            return
+        if not self.remaining and not self._requested():
+            return
+        if self.remaining:
+            # Checked again under the lock, for concurrent requests to take
+            # no more than the armed count
+            with self._lock:
+                if self.remaining:
+                    self.remaining -= 1
+                    self.in_flight += 1
+                    g.profile_claimed = True
+                elif not self._requested():
+                    return
+        g.profile_sampler = StackSampler(threading.get_ident()).start()
+
+    def after_request(self, response: Response) -> Response:
+        sampler = g.pop("profile_sampler", None)
+        if sampler is None:
+            return response
+        stacks = sampler.stop()
+        # Roots named after the callback, which the metrics wrapper records
+        root = g.get("callback_name") or "callback"
+        with self._lock:
+            for stack, count in stacks.items():
+                self._stacks[f"{root};{stack}"] += count
+            if g.pop("profile_claimed", False):
+                self.in_flight -= 1
+            # Saved once, when the last of the armed requests completes
+            if not self.remaining and not self.in_flight:
+                self._save()
+        return response
+
+    def _requested(self) -> bool:
+        return self.authorized(request.headers.get("X-Profile"))
+
+    def _save(self) -> None:
+        if not self._stacks:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        path = os.path.join(self.output_dir, f"{timestamp}.collapsed")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self._stacks.items()):
+                f.write(f"{stack} {count}\n")
+        self._stacks.clear()
+        self.last_path = path
+
+    def view(self) -> Response:
+        authorization = request.headers.get("Authorization", "")
+        if not self.authorized(authorization.removeprefix("Bearer ")):
+            abort(404)
+        if request.method == "POST":
+            count = request.args.get("count", 10, type=int)
+            if count < 1:
+                abort(400)
+            self.arm(count)
+            return jsonify(armed=self.remaining)
+        if self.last_path is None:
+            abort(404)
+        with open(self.last_path, "r", encoding="utf-8") as f:
+            return Response(f.read(), mimetype="text/plain")
+
+
+def init_app(server: Flask, token: str | None = defs.PROFILE_TOKEN) -> Profiler | None:
+    """Adds the profiler to `server`, unless no token enables it."""
+    if not token:
+        return None
+    profiler = Profiler(token)
+    server.before_request(profiler.before_request)
+    server.after_request(profiler.after_request)
+    server.add_url_rule("/_profile", "profile", profiler.view, methods=["GET", "POST"])
+    return profiler
@@ -0,0 +1,251 @@
+"""Drive the Dash callbacks with simulated clients and report their latency.
+
+Each client posts every server-side callback of the page to
+`/_dash-update-component` in turn, as the browser does on its intervals, for
+the given duration. Throughput and p50/p95/p99 latency are reported per
+callback.
+
+Without --url, the app is started against an offline Open-Meteo stand-in
+(`meteo.forecast.replay`) with the given latency and error rate.
+
+Usage:
+    python scripts/loadtest.py [--clients N] [--duration S] [--url URL]
+"""
+
+import argparse
+import collections
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from meteo.forecast.replay import ReplayServer  # noqa: E402
+
+TIMEOUT_S = 60
+
+
+def _components(node):
+    """Yields every component of a serialized Dash layout."""
+    if isinstance(node, list):
+        for child in node:
+            yield from _components(child)
+    elif isinstance(node, dict) and "props" in node:
+        yield node
+        yield from _components(node["props"].get("children"))
+
+
+def _matches(pattern: dict, component_id) -> bool:
+    if not isinstance(component_id, dict) or component_id.keys() != pattern.keys():
+        return False
+    # Wildcards are serialized as ["ALL"], ["MATCH"] or ["ALLSMALLER"]
+    return all(
+        isinstance(value, list) or component_id[key] == value
+        for key, value in pattern.items()
+    )
+
+
+def _resolve(dependencies: list[dict], props: dict, with_values: bool) -> list:
+    """Expands pattern-matching ids into the ids of the layout."""
+    resolved = []
+    for dependency in dependencies:
+        component_id, prop = dependency["id"], dependency["property"]
+        if isinstance(component_id, str) and component_id.startswith("{"):
+            component_id = json.loads(component_id)
+        if isinstance(component_id, str):
+            item = {"id": component_id, "property": prop}
+            if with_values:
+                item["value"] = props.get(component_id, {}).get(prop)
+            resolved.append(item)
+            continue
+        items = []
+        for key, component_props in props.items():
+            if isinstance(key, str) and key.startswith("{"):
+                concrete = json.loads(key)
+                if _matches(component_id, concrete):
+                    item = {"id": concrete, "property": prop}
+                    if with_values:
+                        item["value"] = component_props.get(prop)
+                    items.append(item)
+        resolved.append(items)
+    return resolved
+
+
+def _parse_outputs(output: str) -> list[dict]:
+    parts = output.strip(".").split("...") if output.startswith("..") else [output]
+    return [
+        {"id": part.rsplit(".", 1)[0], "property": part.rsplit(".", 1)[1]}
+        for part in parts
+    ]
+
+
+def build_requests(base_url: str) -> dict[str, dict]:
+    """Returns the request body of every server-side callback, by name."""
+    session = requests.Session()
+    session.trust_env = False
+    layout = session.get(f"{base_url}/_dash-layout", timeout=TIMEOUT_S).json()
+    dependencies = session.get(
+        f"{base_url}/_dash-dependencies", timeout=TIMEOUT_S
+    ).json()
+    props = {}
+    for component in _components(layout):
+        component_id = component["props"].get("id")
+        if component_id is not None:
+            key = (
+                json.dumps(component_id, sort_keys=True)
+                if isinstance(component_id, dict)
+                else component_id
+            )
+            props[key] = component["props"]
+
+    bodies = {}
+    for dependency in dependencies:
+        if dependency.get("clientside_function"):
+            continue
+        outputs = _resolve(_parse_outputs(dependency["output"]), props, False)
+        inputs = _resolve(dependency["inputs"], props, True)
+        first = dependency["inputs"][0]
+        name = dependency["output"].strip(".").split("...")[0]
+        bodies[name] = {
+            "output": dependency["output"],
+            "outputs": outputs if dependency["output"].startswith("..") else outputs[0],
+            "inputs": inputs,
+            "state": _resolve(dependency.get("state", []), props, True),
+            "changedPropIds": [f"{first['id']}.{first['property']}"],
+        }
+    return bodies
+
+
+def run_clients(
+    base_url: str, bodies: dict[str, dict], clients: int, duration: float
+) -> tuple[dict[str, list[float]], dict[str, int]]:
+    latencies = collections.defaultdict(list)
+    errors = collections.Counter()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        session = requests.Session()
+        session.trust_env = False
+        while time.perf_counter() < deadline:
+            for name, body in bodies.items():
+                start = time.perf_counter()
+                try:
+                    response = session.post(
+                        f"{base_url}/_dash-update-component",
+                        json=body,
+                        timeout=TIMEOUT_S,
+                    )
+                    failed = response.status_code not in (200, 204)
+                except requests.RequestException:
+                    failed = True
+                elapsed = time.perf_counter() - start
+                # list.append and Counter updates are atomic under the GIL
+                latencies[name].append(elapsed)
+                if failed:
+                    errors[name] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors
+
+
+def report(latencies: dict[str, list[float]], errors: dict[str, int], duration: float):
+    print(
+        f"{'callback':<48} {'requests':>8} {'errors':>6} {'req/s':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    for name, times in sorted(latencies.items()):
+        percentiles = (
+            statistics.quantiles(times, n=100) if len(times) > 1 else times * 99
+        )
+        print(
+            f"{name[:48]:<48} {len(times):>8} {errors.get(name, 0):>6} "
+            f"{len(times) / duration:>8.1f} {percentiles[49] * 1000:>8.1f} "
+            f"{percentiles[94] * 1000:>8.1f} {percentiles[98] * 1000:>8.1f}"
+        )
+
+
+def _start_app(api_url: str, port: int, data_dir: str) -> subprocess.Popen:
+    # Its own store and cache: replayed forecasts must not end up in those of
+    # the real app, nor may a running app lead the refresh of this one
+    env = {
+        **os.environ,
+        "OPEN_METEO_URL": api_url,
+        "METEO_STORE_DIR": os.path.join(data_dir, "store"),
+        "METEO_CACHE_NAME": os.path.join(data_dir, "cache"),
+    }
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            f"from app import server; server.run(port={port}, threaded=True)",
+        ],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    session = requests.Session()
+    session.trust_env = False
+    start = time.perf_counter()
+    while time.perf_counter() - start < TIMEOUT_S:
+        try:
+            if session.get(f"http://127.0.0.1:{port}/_dash-layout").ok:
+                return process
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    process.terminate()
+    raise TimeoutError("The app did not start")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--url", help="base URL of a running app")
+    parser.add_argument("--port", type=int, default=8051)
+    parser.add_argument("--latency", type=float, default=0.1, help="upstream, s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="upstream")
+    parser.add_argument("--recordings", help="directory of recorded responses")
+    args = parser.parse_args()
+
+    base_url, replay, app = args.url, None, None
+    data_dir = tempfile.TemporaryDirectory(prefix="loadtest-")
+    if base_url is None:
+        replay = ReplayServer(
+            recordings=args.recordings,
+            latency=args.latency,
+            error_rate=args.error_rate,
+        ).start()
+        app = _start_app(replay.url, args.port, data_dir.name)
+        base_url = f"http://127.0.0.1:{args.port}"
+    base_url = base_url.rstrip("/")
+
+    try:
+        bodies = build_requests(base_url)
+        latencies, errors = run_clients(base_url, bodies, args.clients, args.duration)
+        report(latencies, errors, args.duration)
+        if replay is not None:
+            print(f"upstream requests: {replay.requests}, errors: {replay.errors}")
+    finally:
+        if app is not None:
+            app.terminate()
+            app.wait()
+        if replay is not None:
+            replay.stop()
+        data_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
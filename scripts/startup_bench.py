@@ -0,0 +1,97 @@
+"""Measure how long a fresh app process takes to serve its first bytes.
+
+A new server process is started for each run, and the page and the Dash
+layout are polled until they answer. With --offline, upstream requests go
+through an unreachable proxy, like a worker booting without network.
+
+Usage:
+    python scripts/startup_bench.py [--runs N] [--offline]
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIMEOUT_S = 60
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _time_to_first_byte(opener, url: str, start: float) -> float:
+    """Polls `url` until it answers and returns the time elapsed since `start`."""
+    while time.perf_counter() - start < TIMEOUT_S:
+        try:
+            with opener.open(url, timeout=TIMEOUT_S) as response:
+                response.read(1)
+                return time.perf_counter() - start
+        except OSError:
+            time.sleep(0.01)
+    raise TimeoutError(f"{url} did not answer within {TIMEOUT_S}s")
+
+
+def run_once(offline: bool) -> dict[str, float]:
+    with tempfile.TemporaryDirectory(prefix="startup-bench-") as data_dir:
+        return _run_once(offline, data_dir)
+
+
+def _run_once(offline: bool, data_dir: str) -> dict[str, float]:
+    port = _free_port()
+    env = os.environ.copy()
+    # An empty store and cache, for a cold start every run, whatever the app
+    # of this checkout stored
+    env["METEO_STORE_DIR"] = os.path.join(data_dir, "store")
+    env["METEO_CACHE_NAME"] = os.path.join(data_dir, "cache")
+    if offline:
+        env["HTTP_PROXY"] = env["HTTPS_PROXY"] = "http://127.0.0.1:9"
+    # Our own polling must not go through that proxy
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", f"from app import server; server.run(port={port})"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        return {
+            "page": _time_to_first_byte(opener, f"http://127.0.0.1:{port}/", start),
+            "layout": _time_to_first_byte(
+                opener, f"http://127.0.0.1:{port}/_dash-layout", start
+            ),
+        }
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--offline", action="store_true")
+    args = parser.parse_args()
+
+    results = [run_once(args.offline) for _ in range(args.runs)]
+    for name in ("page", "layout"):
+        times = [result[name] for result in results]
+        print(
+            f"time to first byte ({name}): "
+            f"median {statistics.median(times):.2f}s, "
+            f"min {min(times):.2f}s, max {max(times):.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()